@@ -25,10 +25,33 @@ class TkNukeWriteNode(Application):
         Called as the application is being initialized
         """
 
-        self.tk_nuke_writenode = self.import_module("tk_nuke_writenode")
-        self.handler = self.tk_nuke_writenode.NukeWriteNodeHandler()
-
-        # Registering commands
+        # Handler is created on first use, the create panel and the
+        # user interface modules it needs only load when opened
+        self._handler = None
+
+        # Render farm and other batch sessions never show a panel, and
+        # don't track the script, the handler scans it when used instead
+        if not nuke.GUI:
+            self.log_debug(
+                "No user interface, skipping tk-nuke-writenode commands "
+                "and callbacks"
+            )
+            return
+
+        self.__register_commands()
+
+        # Handler is loaded once the first script is opened, its own
+        # callbacks keep the script state up to date from then on
+        nuke.addOnScriptLoad(self.__on_script_load, nodeClass="Root")
+
+    def __on_script_load(self):
+        """Load the handler when a script is opened, converting the
+        placeholders of the script"""
+        if self._handler is None:
+            self.handler.convert_placeholder_nodes()
+
+    def __register_commands(self):
+        """Register the menu commands of the app"""
         create_write_node = lambda: self.handler.create_writenode()
         self.engine.register_command(
             "ShotGrid Write Node",
@@ -53,13 +76,88 @@ class TkNukeWriteNode(Application):
             ),
         )
 
-        # Adding callbacks
-        self.handler.add_callbacks()
+        read_from_all_writes = lambda: self.handler.read_from_all_writes()
+        self.engine.register_command(
+            "Create Reads from All ShotGrid Writes",
+            read_from_all_writes,
+            dict(
+                type="menu",
+                icon="Read.png",
+                context=self.context,
+            ),
+        )
+
+        render_selected = lambda: self.handler.render_selected()
+        self.engine.register_command(
+            "Render Selected ShotGrid Writes",
+            render_selected,
+            dict(
+                type="menu",
+                icon="Write.png",
+                context=self.context,
+            ),
+        )
+
+        render_farm_selected = lambda: self.handler.render_farm_selected()
+        self.engine.register_command(
+            "Submit Selected ShotGrid Writes to Farm",
+            render_farm_selected,
+            dict(
+                type="menu",
+                icon="Write.png",
+                context=self.context,
+            ),
+        )
+
+        refresh_published_files = (
+            lambda: self.handler.refresh_published_files()
+        )
+        self.engine.register_command(
+            "Refresh ShotGrid Publishes",
+            refresh_published_files,
+            dict(
+                type="menu",
+                context=self.context,
+            ),
+        )
+
+    @property
+    def handler(self):
+        """Handler doing the actual work, loaded on first use
+
+        Returns:
+            object: write node handler
+        """
+        if self._handler is None:
+            self.tk_nuke_writenode = self.import_module("tk_nuke_writenode")
+            self._handler = self.tk_nuke_writenode.NukeWriteNodeHandler()
+
+            # Batch sessions scan the script when needed instead
+            if nuke.GUI:
+                self._handler.add_callbacks()
+
+        return self._handler
 
     def destroy_app(self):
         self.log_debug("Destroying tk-nuke-writenode app")
 
-        self.handler.remove_callbacks()
+        if nuke.GUI:
+            nuke.removeOnScriptLoad(self.__on_script_load, nodeClass="Root")
+
+        # Nothing to clean up if handler was never loaded
+        if self._handler is not None:
+            self._handler.remove_callbacks()
+
+    def post_context_change(self, old_context, new_context):
+        """Called after a context change, settings are reloaded for
+        the new context so the write node configurations need a rebuild
+
+        Args:
+            old_context (object): context before the change
+            new_context (object): context after the change
+        """
+        if self._handler is not None:
+            self._handler.reload_settings()
 
     def render_local(self, node):
         """Function to start rendering locally. Will set paths and render.
@@ -69,6 +167,23 @@ class TkNukeWriteNode(Application):
         """
         self.handler.render_local(node)
 
+    def render_multiple(self, nodes, first_frame=None, last_frame=None):
+        """Function to render multiple nodes locally in one pass.
+        Will set paths and render all nodes together.
+
+        Args:
+            nodes (list): nodes to render locally
+            first_frame (int, optional): first frame to render
+            last_frame (int, optional): last frame to render
+
+        Returns:
+            dict: containing node name with error for skipped nodes
+        """
+        failed_nodes = self.handler.render_multiple(
+            nodes, first_frame, last_frame
+        )
+        return failed_nodes
+
     def render_farm(self, node):
         """Function to start rendering on farm. Will set paths and
         use Deadline submission.
@@ -78,6 +193,19 @@ class TkNukeWriteNode(Application):
         """
         self.handler.render_farm(node)
 
+    def render_farm_multiple(self, nodes):
+        """Function to submit multiple nodes to the farm as one batch.
+        Will set paths, submit and increment the script once.
+
+        Args:
+            nodes (list): nodes to submit for render on farm
+
+        Returns:
+            dict: containing node name with error for skipped nodes
+        """
+        failed_nodes = self.handler.render_farm_multiple(nodes)
+        return failed_nodes
+
     def knob_changed(self, node, knob):
         """Function called whenever any knob changes on
         the ShotGrid write node
@@ -96,6 +224,60 @@ class TkNukeWriteNode(Application):
         """
         self.handler.read_from_write(node)
 
+    def verify_render(self, node, first_frame=None, last_frame=None):
+        """Verify all frames of the node have been rendered, also
+        usable without user interface, e.g. as post task on the farm
+
+        Args:
+            node (object): node to verify
+            first_frame (int, optional): first frame expected
+            last_frame (int, optional): last frame expected
+
+        Returns:
+            FrameVerification: frames missing, empty or truncated
+        """
+        verification = self.handler.verify_render(
+            node, first_frame, last_frame
+        )
+        return verification
+
+    def get_output_paths(self, node):
+        """Get path of every view and channel the node renders
+
+        Args:
+            node (object): node to get paths of
+
+        Returns:
+            list: concrete paths written by the node
+        """
+        return self.handler.get_output_paths(node)
+
+    def create_manifest(self, node):
+        """Create manifest with the checksum of every rendered frame,
+        written next to the frames of the node
+
+        Args:
+            node (object): node to create manifest for
+        """
+        self.handler.create_manifest(node)
+
+    def get_verification(self, node):
+        """Get result of the last verification of the node
+
+        Args:
+            node (object): node to get verification of
+
+        Returns:
+            dict: containing the missing, empty and truncated frames,
+            None if the node has not been verified
+        """
+        return self.handler.get_verification(node)
+
+    def read_from_all_writes(self):
+        """Creates read nodes from all ShotGrid write nodes that have
+        rendered, scanning every render directory only once"""
+        self.handler.read_from_all_writes()
+
     def get_all_write_nodes(self):
         """This function will return all existing ShotGrid write nodes
         in the current script
@@ -143,6 +325,71 @@ class TkNukeWriteNode(Application):
         is_published = self.handler.get_published_status(node)
         return is_published
 
+    def get_published_status_bulk(self, nodes):
+        """Check for all specified nodes if they are already published,
+        using as few ShotGrid queries as possible
+
+        Args:
+            nodes (list): nodes to check for publishes
+
+        Returns:
+            dict: containing node with True if published, False if not
+        """
+        published_status = self.handler.get_published_status_bulk(nodes)
+        return published_status
+
+    def get_latest_versions(self, nodes):
+        """Find the latest published version of the output of every node
+        in a single lookup, e.g. to update read nodes to the latest publish
+
+        Args:
+            nodes (list): nodes to find the latest publish of
+
+        Returns:
+            dict: containing node with the published file entity of the
+            highest version, None if never published
+        """
+        latest_versions = self.handler.get_latest_versions(nodes)
+        return latest_versions
+
+    def invalidate_published_status(self, node):
+        """Forget the cached publish status of the node, e.g. when
+        the node has been published by another app
+
+        Args:
+            node (object): node to invalidate publish status
+        """
+        self.handler.invalidate_published_status(node)
+
+    def refresh_published_files(self):
+        """Forget everything known about publishes, and rebuild the
+        local publish index from ShotGrid"""
+        self.handler.refresh_published_files()
+
+    def get_publish_cache_stats(self):
+        """Get hits and misses of the publish status cache
+
+        Returns:
+            dict: containing hits, misses and amount of entries
+        """
+        return self.handler.get_publish_cache_stats()
+
+    def get_directory_listing_stats(self):
+        """Get how many directory listings have been avoided
+
+        Returns:
+            dict: containing listings made and avoided
+        """
+        return self.handler.get_directory_listing_stats()
+
+    def get_directory_service_stats(self):
+        """Get how many directory checks have been avoided
+
+        Returns:
+            dict: containing file system calls made and avoided
+        """
+        return self.handler.get_directory_service_stats()
+
     def get_colorspace(self, node):
         """Get the colorspace the selected node is rendering
 
@@ -156,14 +403,23 @@ class TkNukeWriteNode(Application):
         return colorspace
 
     def update_read_nodes(self):
-        """Update all read nodes to use the published path"""
-        self.handler.update_read_nodes()
+        """Update all read nodes to use the published path
+
+        Returns:
+            dict: report containing the updated read nodes
+        """
+        report = self.handler.update_read_nodes()
+        return report
 
     def convert_placeholder_nodes(self):
         """Converts NoOp nodes used in the template to convert to
         ShotGrid write nodes
+
+        Returns:
+            dict: report containing the converted write node names
         """
-        self.handler.convert_placeholder_nodes()
+        report = self.handler.convert_placeholder_nodes()
+        return report
 
     @staticmethod
     def get_write_nodes():
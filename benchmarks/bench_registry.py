@@ -0,0 +1,88 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""Compare looking up a write node configuration in the registry
+against scanning all categories, as __get_node_settings used to do.
+
+Usage: python benchmarks/bench_registry.py [categories] [data_types]
+"""
+
+import sys
+import timeit
+
+import stubs
+
+
+def build_categories(category_count, data_type_count):
+    """Build a synthetic categories setting"""
+    categories = []
+    for category_index in range(category_count):
+        write_nodes = []
+        for data_type_index in range(data_type_count):
+            write_nodes.append(
+                {
+                    "name": "type%s" % data_type_index,
+                    "file_type": "exr",
+                    "render_template": "render_%s" % category_index,
+                    "publish_template": "publish_%s" % category_index,
+                    "tile_color": 0,
+                    "settings": {"compression": "DWAA"},
+                }
+            )
+        categories.append(
+            {
+                "category_name": "category%s" % category_index,
+                "write_nodes": write_nodes,
+            }
+        )
+    return categories
+
+
+def linear_lookup(app, write_category, data_type):
+    """Lookup as previously done by __get_node_settings"""
+    for category in app.get_setting("categories"):
+        if category.get("category_name") == write_category:
+            for write_node in category.get("write_nodes"):
+                if write_node.get("name") == data_type:
+                    return write_node
+
+
+def main(category_count=40, data_type_count=10, number=20000):
+    app = stubs.install(
+        stubs.FakeApp(
+            {"categories": build_categories(category_count, data_type_count)}
+        )
+    )
+
+    from tk_nuke_writenode.registry import WriteNodeRegistry
+
+    build_time = timeit.timeit(lambda: WriteNodeRegistry(app), number=10) / 10
+    registry = WriteNodeRegistry(app)
+
+    # Worst case for the linear scan is the last entry
+    category = "category%s" % (category_count - 1)
+    data_type = "type%s" % (data_type_count - 1)
+
+    linear = timeit.timeit(
+        lambda: linear_lookup(app, category, data_type), number=number
+    )
+    indexed = timeit.timeit(
+        lambda: registry.get(category, data_type), number=number
+    )
+
+    print("configurations: %s" % len(registry))
+    print("registry build: %.3f ms" % (build_time * 1000))
+    print("linear lookup:  %.3f us" % (linear / number * 1e6))
+    print("indexed lookup: %.3f us" % (indexed / number * 1e6))
+    print("speedup:        %.1fx" % (linear / indexed))
+
+
+if __name__ == "__main__":
+    main(*[int(argument) for argument in sys.argv[1:3]])
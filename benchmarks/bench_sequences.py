@@ -0,0 +1,69 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""Compare scanning a render directory for a single sequence against
+listing the full directory as the app did before, see reference.py.
+
+Usage: python benchmarks/bench_sequences.py [files] [outputs]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import stubs
+
+
+def create_render_directory(file_count, output_count):
+    """Create directory with empty frame files spread over outputs"""
+    directory = tempfile.mkdtemp(prefix="bench_sequences_")
+    frames_per_output = file_count // output_count
+
+    for output_index in range(output_count):
+        for frame in range(1001, 1001 + frames_per_output):
+            file_name = "shot_output%s_v001.%04d.exr" % (output_index, frame)
+            open(os.path.join(directory, file_name), "w").close()
+
+    return directory
+
+
+def timed(function, *args):
+    """Run function once and return seconds spent with the result"""
+    start = time.time()
+    result = function(*args)
+    return time.time() - start, result
+
+
+def main(file_count=100000, output_count=5):
+    stubs.install()
+
+    from reference import get_frame_sequences
+    from tk_nuke_writenode.sequences import scan_frames
+
+    directory = create_render_directory(file_count, output_count)
+    render_path = os.path.join(directory, "shot_output0_v001.%04d.exr")
+
+    try:
+        listing_time, sequences = timed(get_frame_sequences, directory)
+        scan_time, frames = timed(scan_frames, render_path)
+    finally:
+        shutil.rmtree(directory)
+
+    print("files:          %s" % file_count)
+    print("full listing:   %.1f ms" % (listing_time * 1000))
+    print("targeted scan:  %.1f ms" % (scan_time * 1000))
+    print("frames found:   %s" % len(frames))
+    print("speedup:        %.1fx" % (listing_time / scan_time))
+
+
+if __name__ == "__main__":
+    main(*[int(argument) for argument in sys.argv[1:3]])
@@ -0,0 +1,90 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""Measure import and init time of the app, with and without a user
+interface. Every measurement runs in a fresh interpreter, so module
+caching doesn't influence the results. Fails if a batch session loads
+the handler.
+
+Usage: python benchmarks/bench_startup.py [runs]
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+MEASURE = """
+import importlib.util, json, sys, time
+sys.path.insert(0, %(benchmarks)r)
+import stubs
+
+app = stubs.install(nuke=stubs.create_nuke(gui=%(gui)r))
+modules = set(sys.modules)
+
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("app", %(app)r)
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+import_time = time.perf_counter() - start
+
+start = time.perf_counter()
+instance = module.TkNukeWriteNode()
+instance.init_app()
+init_time = time.perf_counter() - start
+
+loaded = sorted(
+    name for name in set(sys.modules) - modules
+    if name.startswith("tk_nuke_writenode")
+)
+print(json.dumps({
+    "import": import_time,
+    "init": init_time,
+    "commands": len(instance.engine.commands),
+    "modules": loaded,
+}))
+"""
+
+
+def measure(gui):
+    """Run one measurement in a new interpreter"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    code = MEASURE % {
+        "benchmarks": directory,
+        "app": os.path.join(os.path.dirname(directory), "app.py"),
+        "gui": gui,
+    }
+    output = subprocess.check_output([sys.executable, "-c", code])
+    return json.loads(output.decode("utf-8"))
+
+
+def main(runs=5):
+    handler_loaded = False
+    for gui in (True, False):
+        results = [measure(gui) for _ in range(runs)]
+        init_times = sorted(result["init"] for result in results)
+        import_times = sorted(result["import"] for result in results)
+
+        print("%s session" % ("interactive" if gui else "batch"))
+        print("  app import:  %.2f ms" % (import_times[runs // 2] * 1000))
+        print("  init_app:    %.2f ms" % (init_times[runs // 2] * 1000))
+        print("  commands:    %s" % results[0]["commands"])
+        print("  modules:     %s" % ", ".join(results[0]["modules"]))
+
+        # Batch sessions should only pay for the app itself
+        if not gui and "tk_nuke_writenode.handler" in results[0]["modules"]:
+            print("  handler was loaded in a batch session")
+            handler_loaded = True
+
+    return not handler_loaded
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main(*[int(argument) for argument in sys.argv[1:2]]) else 1)
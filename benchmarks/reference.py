@@ -0,0 +1,102 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""Reference implementations of the app before it was optimized, so
+benchmarks keep comparing against the same baseline while the app
+itself changes.
+"""
+
+import os
+import re
+
+
+def get_frame_sequences(folder, extensions=None, frame_spec=None):
+    """Copied from the publisher app, and customized to return
+    file sequences with frame lists instead of filenames
+
+    Args:
+        folder (str): folder to scan for frame sequences
+        extensions (str, optional): extension to search for. Defaults
+        to None (all).
+        frame_spec (str, optional): if required another frame spec
+        can be used
+        for returning. Defaults to None (%04d).
+
+    Returns:
+        list: containing all frame sequences in specified folder
+    """
+
+    FRAME_REGEX = re.compile(r"(.*)([._-])(\d+)\.([^.]+)$", re.IGNORECASE)
+
+    # list of already processed file names
+    processed_names = {}
+
+    # examine the files in the folder
+    for filename in os.listdir(folder):
+        file_path = os.path.join(folder, filename)
+
+        if os.path.isdir(file_path):
+            # ignore subfolders
+            continue
+
+        # see if there is a frame number
+        frame_pattern_match = re.search(FRAME_REGEX, filename)
+
+        if not frame_pattern_match:
+            # no frame number detected. carry on.
+            continue
+
+        prefix = frame_pattern_match.group(1)
+        frame_sep = frame_pattern_match.group(2)
+        frame_str = frame_pattern_match.group(3)
+        extension = frame_pattern_match.group(4) or ""
+
+        # filename without a frame number.
+        file_no_frame = "%s.%s" % (prefix, extension)
+
+        if file_no_frame in processed_names:
+            # already processed this sequence. add the framenumber to the list, later we can use this to
+            # determine the framerange
+            processed_names[file_no_frame]["frame_list"].append(frame_str)
+            continue
+
+        if extensions and extension not in extensions:
+            # not one of the extensions supplied
+            continue
+
+        # make sure we maintain the same padding
+        if not frame_spec:
+            padding = len(frame_str)
+            frame_spec = "%%0%dd" % (padding,)
+
+        seq_filename = "%s%s%s" % (prefix, frame_sep, frame_spec)
+
+        if extension:
+            seq_filename = "%s.%s" % (seq_filename, extension)
+
+        # build the path in the same folder
+        seq_path = os.path.join(folder, seq_filename)
+
+        # remember each seq path identified and a list of files matching the
+        # seq pattern
+        processed_names[file_no_frame] = {
+            "sequence_path": seq_path,
+            "frame_list": [frame_str],
+        }
+
+    # build the final list of sequence paths to return
+    frame_sequences = []
+    for file_no_frame in processed_names:
+        seq_info = processed_names[file_no_frame]
+        seq_path = seq_info["sequence_path"]
+
+        frame_sequences.append((seq_path, seq_info["frame_list"]))
+
+    return frame_sequences
@@ -0,0 +1,335 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""Headless benchmark suite of the write node handler.
+
+Generates synthetic scripts with the requested amount of ShotGrid write
+nodes, Read nodes and placeholders on the nuke stand-in, and render
+directories with frame files on disk. Every result is printed as a JSON
+line, so results can be collected and compared between revisions.
+
+ShotGrid is answered by an in memory stand-in, or by mockgun when the
+schema files of a site are passed with --schema and --schema-entity.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--sizes 10,100,1000,10000]
+        [--frames 1000,10000,100000] [--output results.jsonl]
+        [--schema schema.pickle --schema-entity schema_entity.pickle]
+        [--publish-index]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import stubs
+from reference import get_frame_sequences
+
+# Categories and data types of the synthetic configuration
+CATEGORIES = {
+    "main": ["exr (dwaa 16bit)"],
+    "prerender": ["exr (dwaa 16bit)", "exr (zip 16bit)", "exr (zip 32bit)"],
+    "mattepainting": ["tiff (deflate 16 bit)"],
+}
+
+
+def create_mockgun(schema_path, schema_entity_path):
+    """Create mockgun connection using the schema of a site"""
+    from shotgun_api3.lib import mockgun
+
+    mockgun.Shotgun.set_schema_paths(schema_path, schema_entity_path)
+    return mockgun.Shotgun(
+        "https://benchmark.shotgrid.autodesk.com", "benchmark", "key"
+    )
+
+
+def publish(sg, codes):
+    """Make the codes known as published on the connection"""
+    if isinstance(sg, stubs.FakeShotgun):
+        sg.codes = set(codes)
+        return
+
+    for code in codes:
+        sg.create(
+            "PublishedFile",
+            {"code": code, "project": {"type": "Project", "id": 1}},
+        )
+
+
+def create_app(root, sg=None):
+    """Create app stand-in with a configuration rendering into root"""
+    categories = []
+    for category_name, data_types in CATEGORIES.items():
+        categories.append(
+            {
+                "category_name": category_name,
+                "write_nodes": [
+                    {
+                        "name": data_type,
+                        "file_type": data_type.split()[0],
+                        "render_template": "render_work",
+                        "publish_template": "render_publish",
+                        "tile_color": 0,
+                        "settings": {
+                            "colorspace": "scene_linear",
+                            "datatype": "16 bit half",
+                            "channels": "rgba",
+                            "compression": "DWAA",
+                        },
+                    }
+                    for data_type in data_types
+                ],
+            }
+        )
+
+    root = root.replace(os.sep, "/")
+    return stubs.FakeApp(
+        settings={
+            "categories": categories,
+            "template_script_work": "script_work",
+            "main_category_name": "main",
+            "main_write_name": "main",
+            "default_category": "prerender",
+        },
+        templates={
+            "script_work": "/work/shot_v{version}.nk",
+            "render_work": root
+            + "/work/{output}/v{version}/{output}.{SEQ}.exr",
+            "render_publish": root
+            + "/publish/{output}/v{version}/{output}.{SEQ}.exr",
+        },
+        shotgun=sg or stubs.FakeShotgun(),
+    )
+
+
+class Suite(object):
+    """Runs the benchmarks and collects the results"""
+
+    def __init__(self, output=None, publish_index=False):
+        self.output = output
+        self.publish_index = publish_index
+        self.results = []
+        self.revision = self.__get_revision()
+
+    @staticmethod
+    def __get_revision():
+        try:
+            return (
+                subprocess.check_output(
+                    ["git", "rev-parse", "--short", "HEAD"],
+                    cwd=stubs.ROOT,
+                    stderr=subprocess.DEVNULL,
+                )
+                .decode("utf-8")
+                .strip()
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def time(self, name, size, function, *args, **kwargs):
+        """Time a single call of the function and record it"""
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        seconds = time.perf_counter() - start
+
+        record = {
+            "benchmark": name,
+            "size": size,
+            "seconds": round(seconds, 6),
+            "revision": self.revision,
+            "python": platform.python_version(),
+            "publish_index": self.publish_index,
+        }
+        self.results.append(record)
+
+        line = json.dumps(record, sort_keys=True)
+        print(line)
+        if self.output:
+            with open(self.output, "a") as output_file:
+                output_file.write(line + "\n")
+
+        return result
+
+
+def build_script(nuke, handler, app, size):
+    """Create write nodes, Reads and placeholders in an empty script"""
+    nuke.reset()
+    create_write = handler._NukeWriteNodeHandler__create_write
+    options = handler._NukeWriteNodeHandler__get_write_node_options()
+    render_template = app.templates["render_work"]
+
+    write_nodes = []
+    for index in range(size):
+        output_name = "output%s" % index
+        write_node = create_write(
+            options,
+            "prerender",
+            output_name,
+            CATEGORIES["prerender"][index % 3],
+            interactive=False,
+        )
+        render_path = render_template.apply_fields(
+            {"version": 1, "output": output_name, "SEQ": "FORMAT: %d"}
+        )
+        write_node["file"].setValue(render_path)
+        write_nodes.append(write_node)
+
+    # Half of the Reads read rendered outputs, some written as ####
+    for index in range(size):
+        read_node = nuke.nodes.Read()
+        if index % 2:
+            render_path = write_nodes[index]["file"].value()
+            if index % 4 == 1:
+                render_path = render_path.replace("%04d", "####")
+        else:
+            render_path = "/elements/plate%s.%%04d.exr" % index
+        read_node["file"].setValue(render_path)
+
+    # Placeholders next to unrelated metadata nodes
+    for index in range(size):
+        placeholder = nuke.nodes.ModifyMetaData()
+        if index % 2:
+            placeholder["name"].setValue(
+                "ShotGridWriteNodePlaceholder%s" % index
+            )
+            placeholder._metadata = {
+                "category": "prerender",
+                "output": "placeholder%s" % index,
+                "data_type": CATEGORIES["prerender"][0],
+            }
+
+    return write_nodes
+
+
+def create_render_directory(root, frame_count, output_count=4):
+    """Create directory with frame files spread over several outputs"""
+    directory = os.path.join(root, "frames_%s" % frame_count)
+    os.makedirs(directory)
+
+    for output_index in range(output_count):
+        for frame in range(1001, 1001 + frame_count // output_count):
+            file_name = "output%s.%04d.exr" % (output_index, frame)
+            open(os.path.join(directory, file_name), "w").close()
+
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000,10000")
+    parser.add_argument("--frames", default="1000,10000,100000")
+    parser.add_argument("--output", help="JSON-lines file to append to")
+    parser.add_argument("--schema", help="mockgun schema pickle")
+    parser.add_argument("--schema-entity", help="mockgun entity pickle")
+    parser.add_argument(
+        "--publish-index",
+        action="store_true",
+        help="answer publish lookups from the local publish index",
+    )
+    arguments = parser.parse_args()
+
+    sg = None
+    if arguments.schema:
+        sg = create_mockgun(arguments.schema, arguments.schema_entity)
+
+    root = tempfile.mkdtemp(prefix="tk_nuke_writenode_bench_")
+    nuke = stubs.create_nuke()
+    app = stubs.install(create_app(root, sg), nuke)
+    project_id = app.context.project["id"]
+
+    # Publish index is disabled by default, as it ships
+    if arguments.publish_index:
+        app.settings["publish_index_enabled"] = True
+        app.cache_location = os.path.join(root, "cache")
+
+    from tk_nuke_writenode.handler import NukeWriteNodeHandler
+    from tk_nuke_writenode.sequences import scan_frames
+
+    suite = Suite(arguments.output, arguments.publish_index)
+
+    try:
+        for size in [int(size) for size in arguments.sizes.split(",")]:
+            handler = NukeWriteNodeHandler()
+            handler.add_callbacks()
+
+            write_nodes = build_script(nuke, handler, app, size)
+
+            # Publish every other output
+            publish(
+                app.shotgun,
+                [
+                    os.path.basename(node["file"].value())
+                    for node in write_nodes[::2]
+                ],
+            )
+
+            suite.time(
+                "get_all_write_nodes", size, handler.get_all_write_nodes
+            )
+
+            # Start from the same state for every lookup, both the
+            # lookup and the index can be refreshed
+            handler.published_files.refresh(project_id)
+            suite.time(
+                "get_published_status",
+                size,
+                lambda: [handler.get_published_status(n) for n in write_nodes],
+            )
+
+            handler.published_files.refresh(project_id)
+            suite.time(
+                "get_published_status_bulk",
+                size,
+                handler.get_published_status_bulk,
+                write_nodes,
+            )
+
+            suite.time("update_read_nodes", size, handler.update_read_nodes)
+            suite.time(
+                "convert_placeholder_nodes",
+                size,
+                handler.convert_placeholder_nodes,
+            )
+
+            handler.remove_callbacks()
+
+        # Full listing as the app did before, named as it was in the
+        # handler so results stay comparable between revisions
+        for frame_count in [
+            int(count) for count in arguments.frames.split(",")
+        ]:
+            directory = create_render_directory(root, frame_count)
+            suite.time(
+                "__get_frame_sequences",
+                frame_count,
+                get_frame_sequences,
+                directory,
+            )
+            suite.time(
+                "scan_frames",
+                frame_count,
+                scan_frames,
+                os.path.join(directory, "output0.%04d.exr"),
+            )
+
+    finally:
+        shutil.rmtree(root)
+
+    return suite.results
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
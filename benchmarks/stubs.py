@@ -0,0 +1,582 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""Stand-ins for the modules only available inside a Toolkit enabled
+Nuke session, so the app can be benchmarked headless.
+
+The nuke stand-in keeps a real node graph in memory: groups with their
+internal nodes, knobs, node callbacks and the calls the app uses. The
+ShotGrid stand-in answers the PublishedFile queries the app sends; a
+mockgun instance can be used instead where a schema is available.
+"""
+
+import datetime
+import importlib
+import logging
+import os
+import re
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PYTHON_PATH = os.path.join(ROOT, "python")
+
+# Update time of every publish the ShotGrid stand-in knows
+UPDATED_AT = datetime.datetime(2024, 1, 1)
+
+# Used for templates created without a definition
+DEFAULT_DEFINITION = "/renders/{output}/v{version}/{output}.{SEQ}.exr"
+
+
+class FakeTemplate(object):
+    """Template stand-in supporting {key} definitions, version is a
+    three digit integer and SEQ a four digit frame number"""
+
+    def __init__(self, name, definition=None):
+        self.name = name
+        self.definition = definition or DEFAULT_DEFINITION
+        self.keys = re.findall(r"{(\w+)}", self.definition)
+
+        pattern = re.escape(self.definition)
+        for key in set(self.keys):
+            group = r"(?P<%s>\d+)" if key == "version" else r"(?P<%s>[^/]+)"
+            pattern = pattern.replace(re.escape("{%s}" % key), group % key, 1)
+            pattern = pattern.replace(re.escape("{%s}" % key), "(?P=%s)" % key)
+        self.regex = re.compile(pattern + "$")
+
+    def get_fields(self, path):
+        match = self.regex.match(path.replace(os.sep, "/"))
+        if match is None:
+            raise ValueError("%s does not match %s" % (path, self.name))
+
+        fields = match.groupdict()
+        fields["version"] = int(fields["version"])
+        return fields
+
+    def apply_fields(self, fields):
+        values = dict(fields)
+        values["version"] = "%03d" % values["version"]
+        if str(values.get("SEQ", "")).startswith("FORMAT:"):
+            values["SEQ"] = "%04d"
+        return self.definition.format(**values)
+
+
+class FakeShotgun(object):
+    """ShotGrid stand-in answering PublishedFile queries by code, and
+    the paged queries of all publishes syncing the publish index"""
+
+    def __init__(self, codes=()):
+        self.codes = set(codes)
+        self.calls = 0
+
+    def __get_codes(self, filters):
+        for field, operator, value in filters:
+            if field == "code":
+                return [value] if operator == "is" else list(value)
+        return None
+
+    def __find_all(self, entity_type, filters, limit=None):
+        last_id = 0
+        for field, operator, value in filters:
+            if field == "id" and operator == "greater_than":
+                last_id = value
+
+        results = [
+            {
+                "type": entity_type,
+                "id": index,
+                "code": code,
+                "updated_at": UPDATED_AT,
+            }
+            for index, code in enumerate(sorted(self.codes), 1)
+            if index > last_id
+        ]
+        return results[:limit] if limit else results
+
+    def find(self, entity_type, filters, fields=None, **kwargs):
+        self.calls += 1
+        if kwargs.get("retired_only"):
+            return []
+        if self.__get_codes(filters) is None:
+            return self.__find_all(entity_type, filters, kwargs.get("limit"))
+
+        return [
+            {"type": entity_type, "id": index, "code": code}
+            for index, code in enumerate(self.__get_codes(filters))
+            if code in self.codes
+        ]
+
+    def find_one(self, entity_type, filters, fields=None, **kwargs):
+        results = self.find(entity_type, filters, fields)
+        return results[0] if results else None
+
+
+class FakeContext(object):
+    """Context stand-in on a single project"""
+
+    def __init__(self, project_id=1):
+        self.project = {"type": "Project", "id": project_id}
+
+
+class FakeEngine(object):
+    """Engine stand-in collecting registered commands"""
+
+    def __init__(self):
+        self.commands = {}
+        self.context = FakeContext()
+
+    def register_command(self, name, callback, properties=None):
+        self.commands[name] = callback
+
+
+class FakeApp(object):
+    """Application stand-in serving settings and templates, also used
+    as the Application base class"""
+
+    def __init__(self, settings=None, templates=None, shotgun=None):
+        self.settings = settings or {}
+        self.templates = {}
+        self.shotgun = shotgun
+        self.engine = FakeEngine()
+        self.context = self.engine.context
+
+        for name, definition in (templates or {}).items():
+            self.templates[name] = FakeTemplate(name, definition)
+
+    def import_module(self, name):
+        return importlib.import_module(name)
+
+    def log_debug(self, message):
+        logging.getLogger("tk-nuke-writenode").debug(message)
+
+    def get_setting(self, key, default=None):
+        return self.settings.get(key, default)
+
+    def get_template_by_name(self, name):
+        return self.templates.setdefault(name, FakeTemplate(name))
+
+    def get_template(self, key):
+        return self.get_template_by_name(self.settings.get(key))
+
+
+class FakeKnob(object):
+    """Knob stand-in holding a value"""
+
+    def __init__(self, name, value=""):
+        self._name = name
+        self._value = value
+        self.values = []
+
+    def name(self):
+        return self._name
+
+    def value(self):
+        return self._value
+
+    def setValue(self, value):
+        self._value = value
+
+    def setValues(self, values):
+        self.values = list(values)
+
+    def fromUserText(self, value):
+        self._value = value
+
+    def execute(self):
+        pass
+
+
+class FakeNameKnob(FakeKnob):
+    """Name knob stand-in, renaming keeps the node findable by name"""
+
+    def __init__(self, node, value):
+        super(FakeNameKnob, self).__init__("name", value)
+        self._node = node
+
+    def setValue(self, value):
+        parent = self._node._parent
+        if parent is not None and parent.children.get(self._value) is (
+            self._node
+        ):
+            del parent.children[self._value]
+            parent.children[value] = self._node
+
+        self._value = value
+
+
+class FakeNode(object):
+    """Node stand-in, groups contain nodes and work as context manager"""
+
+    def __init__(self, nuke, node_class, name, parent=None, knobs=None):
+        self._nuke = nuke
+        self._class = node_class
+        self._parent = parent
+        self._knobs = {"name": FakeNameKnob(self, name)}
+        self._inputs = {}
+        self._metadata = {}
+        self.children = {}
+
+        for knob_name in ("xpos", "ypos"):
+            self._knobs[knob_name] = FakeKnob(knob_name, 0)
+        for knob_name, value in (knobs or {}).items():
+            self._knobs[knob_name] = (
+                value
+                if isinstance(value, FakeKnob)
+                else FakeKnob(knob_name, value)
+            )
+
+    def Class(self):
+        return self._class
+
+    def name(self):
+        return self._knobs["name"].value()
+
+    def fullName(self):
+        if self._parent is None or self._parent is self._nuke.root():
+            return self.name()
+        return "%s.%s" % (self._parent.fullName(), self.name())
+
+    def knob(self, name):
+        return self._knobs.get(name)
+
+    def knobs(self):
+        return dict(self._knobs)
+
+    def __getitem__(self, name):
+        return self._knobs[name]
+
+    def width(self):
+        return 1920
+
+    def height(self):
+        return 1080
+
+    def xpos(self):
+        return self._knobs["xpos"].value()
+
+    def ypos(self):
+        return self._knobs["ypos"].value()
+
+    def input(self, index):
+        return self._inputs.get(index)
+
+    def setInput(self, index, node):
+        self._inputs[index] = node
+
+    def metadata(self):
+        return dict(self._metadata)
+
+    def __enter__(self):
+        self._nuke._context.append(self)
+        return self
+
+    def __exit__(self, *args):
+        self._nuke._context.pop()
+        return False
+
+
+class FakeUndo(object):
+    """Undo stand-in"""
+
+    def begin(self, name=None):
+        pass
+
+    def end(self):
+        pass
+
+
+class FakeProgressTask(object):
+    """Progress bar stand-in, never cancelled"""
+
+    def __init__(self, title):
+        self.title = title
+
+    def setMessage(self, message):
+        pass
+
+    def setProgress(self, progress):
+        pass
+
+    def isCancelled(self):
+        return False
+
+
+class FakeNuke(types.ModuleType):
+    """nuke module stand-in with an in memory node graph"""
+
+    # Knobs of the internal Write node
+    WRITE_KNOBS = {
+        "file": "",
+        "file_type": "exr",
+        "colorspace": "scene_linear",
+        "channels": "rgba",
+        "datatype": "16 bit half",
+        "compression": "Zip (1 scanline)",
+    }
+
+    def __init__(self, gui=False):
+        super(FakeNuke, self).__init__("nuke")
+        self.GUI = gui
+        self.env = {"gui": gui}
+        self.Undo = FakeUndo
+        self.ProgressTask = FakeProgressTask
+        self.nodes = types.SimpleNamespace(
+            sgWrite=lambda: self.createNode("sgWrite"),
+            Read=lambda: self.createNode("Read"),
+            ModifyMetaData=lambda: self.createNode("ModifyMetaData"),
+        )
+
+        self.messages = []
+        self.executed = []
+        self._root = FakeNode(self, "Root", "root")
+        self._root.firstFrame = lambda: 1001
+        self._root.lastFrame = lambda: 1100
+        self._root.name = lambda: "/work/shot_v001.nk"
+        self._context = [self._root]
+        self._callbacks = {}
+        self._this = []
+        self._counters = {}
+
+        for callback in (
+            "OnCreate",
+            "OnDestroy",
+            "KnobChanged",
+            "OnScriptLoad",
+            "OnScriptClose",
+            "OnScriptSave",
+        ):
+            setattr(self, "add" + callback, self.__adder(callback))
+            setattr(self, "remove" + callback, self.__remover(callback))
+
+    def __adder(self, callback):
+        def add(function, args=(), kwargs=None, nodeClass="*"):
+            self._callbacks.setdefault(callback, []).append(
+                (function, nodeClass)
+            )
+
+        return add
+
+    def __remover(self, callback):
+        def remove(function, args=(), kwargs=None, nodeClass="*"):
+            callbacks = self._callbacks.get(callback, [])
+            if (function, nodeClass) in callbacks:
+                callbacks.remove((function, nodeClass))
+
+        return remove
+
+    def run_callbacks(self, callback, node, knob=None):
+        """Call the registered callbacks for the node"""
+        self._this.append((node, knob))
+        try:
+            for function, node_class in list(
+                self._callbacks.get(callback, [])
+            ):
+                if node_class in ("*", node.Class()):
+                    function()
+        finally:
+            self._this.pop()
+
+    def reset(self):
+        """Start with an empty script, keeping registered callbacks"""
+        self._root.children.clear()
+        self._root.name = lambda: "/work/shot_v001.nk"
+        self._context = [self._root]
+        self._counters.clear()
+        self.messages = []
+        self.executed = []
+
+    def thisNode(self):
+        return self._this[-1][0]
+
+    def thisKnob(self):
+        return self._this[-1][1]
+
+    def root(self):
+        return self._root
+
+    def __unique_name(self, node_class):
+        count = self._counters.get(node_class, 0) + 1
+        self._counters[node_class] = count
+        return "%s%s" % (node_class, count)
+
+    def createNode(self, node_class, *args, **kwargs):
+        parent = self._context[-1]
+        name = self.__unique_name(node_class)
+
+        if node_class == "sgWrite":
+            node = self.__create_sg_write(parent, name)
+        elif node_class == "Read":
+            node = FakeNode(
+                self,
+                node_class,
+                name,
+                parent,
+                dict(
+                    (knob, "")
+                    for knob in (
+                        "file",
+                        "colorspace",
+                        "first",
+                        "origfirst",
+                        "last",
+                        "origlast",
+                    )
+                ),
+            )
+        else:
+            node = FakeNode(self, node_class, name, parent)
+
+        parent.children[name] = node
+        self.run_callbacks("OnCreate", node)
+        return node
+
+    def __create_sg_write(self, parent, name):
+        group = FakeNode(self, "Group", name, parent)
+        write = FakeNode(self, "Write", "Write1", group, self.WRITE_KNOBS)
+        group.children["Write1"] = write
+
+        for knob_name, value in (
+            ("output", ""),
+            ("category", ""),
+            ("dataType", ""),
+            ("tile_color", 0),
+            ("isShotGridWriteNode", ""),
+            ("verification", ""),
+            ("outputPaths", ""),
+        ):
+            group._knobs[knob_name] = FakeKnob(knob_name, value)
+        group._knobs["file"] = write["file"]
+        group._knobs["Render"] = FakeKnob("Render")
+
+        return group
+
+    def allNodes(self, node_class=None, group=None):
+        parent = group or self._context[-1]
+        return [
+            node
+            for node in parent.children.values()
+            if node_class is None or node.Class() == node_class
+        ]
+
+    def selectedNodes(self):
+        return []
+
+    def views(self):
+        return ["main"]
+
+    def toNode(self, name):
+        return self._context[-1].children.get(name)
+
+    def delete(self, node):
+        self.run_callbacks("OnDestroy", node)
+        node._parent.children.pop(node.name(), None)
+
+    def message(self, message):
+        self.messages.append(message)
+
+    def zoom(self, *args):
+        pass
+
+    def scriptSaveAs(self, path):
+        self._root.name = lambda: path
+        self.run_callbacks("OnScriptSave", self._root)
+
+    def executeInMainThread(self, function, args=(), kwargs=None):
+        function(*args, **(kwargs or {}))
+
+    def executeInMainThreadWithResult(self, function, args=(), kwargs=None):
+        return function(*args, **(kwargs or {}))
+
+    def execute(self, node, first, last, increment=1):
+        self.executed.append(([node.fullName()], ((first, last, increment),)))
+
+    def executeMultiple(self, nodes, ranges, *args):
+        self.executed.append(([node.fullName() for node in nodes], ranges))
+
+
+def create_nuke(gui=False):
+    """Create nuke module stand-in without any nodes
+
+    Args:
+        gui (bool, optional): pretend to run with a user interface
+
+    Returns:
+        module: nuke stand-in
+    """
+    return FakeNuke(gui)
+
+
+def create_deadline_submission(failing=()):
+    """Create deadline_submission module stand-in, recording the names
+    of the nodes submitted
+
+    Args:
+        failing (iterable, optional): names of nodes failing to submit
+
+    Returns:
+        module: deadline_submission stand-in
+    """
+    module = types.ModuleType("deadline_submission")
+    module.submitted = []
+
+    class DeadlineSubmission(object):
+        def submit(self, node):
+            if node.name() in failing:
+                return False
+
+            module.submitted.append(node.name())
+            return True
+
+    module.DeadlineSubmission = DeadlineSubmission
+    return module
+
+
+def install(app=None, nuke=None):
+    """Install the stand-in modules and make the app package importable.
+    Modules imported before keep the stand-ins they imported, so when
+    installing again within a process only the current bundle changes
+    and the installed nuke stand-in is reused, e.g. by tests.
+
+    Args:
+        app (FakeApp, optional): bundle returned as the current bundle
+        nuke (module, optional): nuke stand-in, defaults to the one
+        installed before, or one created by create_nuke
+
+    Returns:
+        FakeApp: the current bundle
+    """
+    app = app or FakeApp()
+
+    sgtk = sys.modules.get("sgtk")
+    if not getattr(sgtk, "is_stand_in", False):
+        sgtk = types.ModuleType("sgtk")
+        sgtk.is_stand_in = True
+        sgtk.platform = types.ModuleType("sgtk.platform")
+        sgtk.platform.get_logger = logging.getLogger
+        sgtk.platform.Application = FakeApp
+        sys.modules["sgtk"] = sgtk
+        sys.modules["sgtk.platform"] = sgtk.platform
+
+    sgtk.platform.current_bundle = lambda: app
+    sgtk.platform.current_engine = lambda: app.engine
+
+    if nuke is None:
+        nuke = sys.modules.get("nuke")
+        if not isinstance(nuke, FakeNuke):
+            nuke = create_nuke()
+    sys.modules["nuke"] = nuke
+    sys.modules.setdefault("deadline_submission", create_deadline_submission())
+    sys.modules["nukescripts"] = types.ModuleType("nukescripts")
+    sys.modules["nukescripts"].PythonPanel = object
+
+    if PYTHON_PATH not in sys.path:
+        sys.path.insert(0, PYTHON_PATH)
+
+    return app
@@ -0,0 +1,380 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from .timing import timer
+
+# standard toolkit logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+class DirectoryService(object):
+    """
+    Makes sure directories exist, remembering every directory known to
+    exist for the lifetime of the process so network storage is only
+    asked once per directory
+    """
+
+    MAX_WORKERS = 2
+
+    def __init__(self):
+        self._known_directories = set()
+        self._lock = threading.Lock()
+        self._executor = None
+
+        # Counters to see how many file system calls have been avoided
+        self.calls_made = 0
+        self.calls_avoided = 0
+
+    def ensure(self, directory):
+        """Make sure the directory exists, creating it if needed
+
+        Args:
+            directory (str): directory to create
+        """
+        directory = os.path.normpath(directory)
+
+        with self._lock:
+            if directory in self._known_directories:
+                self.calls_avoided += 1
+                return
+
+        # Other sessions or farm workers could create the same directory
+        # at the same time, which is fine as long as it exists afterwards
+        try:
+            with timer.span("filesystem.makedirs"):
+                os.makedirs(directory)
+        except OSError:
+            if not os.path.isdir(directory):
+                raise
+
+        with self._lock:
+            self.calls_made += 1
+
+            # All parent directories exist as well now
+            while directory not in self._known_directories:
+                self._known_directories.add(directory)
+
+                parent = os.path.dirname(directory)
+                if parent == directory:
+                    break
+                directory = parent
+
+    def ensure_async(self, directory):
+        """Make sure the directory exists in the background, e.g. to
+        create directories before they are needed
+
+        Args:
+            directory (str): directory to create
+
+        Returns:
+            object: future of the task
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS)
+
+        return self._executor.submit(self.__ensure_quietly, directory)
+
+    def ensure_all(self, directories):
+        """Make sure all directories exist, creating the missing ones at
+        the same time
+
+        Args:
+            directories (iterable): directories to create
+
+        Raises:
+            OSError: if any of the directories could not be created
+        """
+        directories = list(dict.fromkeys(directories))
+        if len(directories) < 2:
+            for directory in directories:
+                self.ensure(directory)
+            return
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS)
+
+        futures = [
+            self._executor.submit(self.ensure, directory)
+            for directory in directories
+        ]
+
+        # Raise the first error, after all directories have been tried
+        for future in futures:
+            future.exception()
+        for future in futures:
+            future.result()
+
+    def forget(self, directory):
+        """Forget directory is known to exist, e.g. after it has been
+        removed
+
+        Args:
+            directory (str): directory to forget
+        """
+        directory = os.path.normpath(directory)
+
+        with self._lock:
+            self._known_directories = set(
+                known
+                for known in self._known_directories
+                if known != directory
+                and not known.startswith(directory + os.sep)
+            )
+
+    def get_stats(self):
+        """Get statistics of the service
+
+        Returns:
+            dict: containing file system calls made and avoided, and
+            amount of directories known to exist
+        """
+        with self._lock:
+            return {
+                "calls_made": self.calls_made,
+                "calls_avoided": self.calls_avoided,
+                "known_directories": len(self._known_directories),
+            }
+
+    def log_stats(self):
+        """Log how many file system calls have been avoided"""
+        stats = self.get_stats()
+        if stats["calls_made"] or stats["calls_avoided"]:
+            logger.debug(
+                "Directory service: %(calls_made)s calls made, "
+                "%(calls_avoided)s avoided, %(known_directories)s "
+                "directories known to exist" % stats
+            )
+
+    def __ensure_quietly(self, directory):
+        """Make sure the directory exists, only logging failures as
+        nobody is waiting for the result
+
+        Args:
+            directory (str): directory to create
+        """
+        try:
+            self.ensure(directory)
+        except Exception as e:
+            logger.debug(
+                "Could not create %s in background, because %s"
+                % (directory, str(e))
+            )
+
+
+class _Listing(object):
+    """
+    File names of a directory, with the frames found per sequence
+    """
+
+    __slots__ = ("mtime", "names", "frames")
+
+    def __init__(self, mtime, names):
+        self.mtime = mtime
+        self.names = names
+        self.frames = {}
+
+
+class DirectoryListingCache(object):
+    """
+    Remembers the files in directories for the lifetime of the process.
+    A listing stays valid as long as the modification time of the
+    directory doesn't change, so a single stat replaces listing the
+    directory again. Frames found per sequence are remembered as well.
+    """
+
+    # Listings of directories modified this recently are not kept, as
+    # file systems with coarse timestamps could miss later changes
+    MTIME_GRANULARITY = 2.0
+
+    def __init__(self, max_entries=200000):
+        """Cache with the specified limit
+
+        Args:
+            max_entries (int, optional): maximum amount of file names kept
+            for all directories together. Defaults to 200000.
+        """
+        self.max_entries = max_entries
+        self._listings = OrderedDict()
+        self._entries = 0
+        self._lock = threading.Lock()
+
+        # Counters to see how many listings have been avoided
+        self.listings_made = 0
+        self.listings_avoided = 0
+
+    def list(self, directory, progress=None):
+        """Get names of the files in the directory, subdirectories are
+        not included
+
+        Args:
+            directory (str): directory to list
+            progress (Progress, optional): progress of the task listing
+            the directory, used to stop when cancelled
+
+        Returns:
+            tuple: file names
+
+        Raises:
+            OSError: if the directory can't be listed
+        """
+        return self.__get_listing(directory, progress).names
+
+    def get_frames(self, directory, patterns, progress=None):
+        """Get frames of every sequence in the directory
+
+        Args:
+            directory (str): directory containing the sequences
+            patterns (list): SequencePattern of every sequence
+            progress (Progress, optional): progress of the task listing
+            the directory, used to stop when cancelled
+
+        Returns:
+            list: sorted frame numbers for every pattern
+
+        Raises:
+            OSError: if the directory can't be listed
+        """
+        listing = self.__get_listing(directory, progress)
+
+        frames = []
+        for pattern in patterns:
+            key = (pattern.prefix, pattern.padding, pattern.extension)
+
+            with self._lock:
+                pattern_frames = listing.frames.get(key)
+
+            if pattern_frames is None:
+                pattern_frames = []
+                for name in listing.names:
+                    frame = pattern.match(name)
+                    if frame is not None:
+                        pattern_frames.append(frame)
+                pattern_frames.sort()
+
+                with self._lock:
+                    listing.frames[key] = pattern_frames
+
+            # Callers are free to change the frames
+            frames.append(list(pattern_frames))
+
+        return frames
+
+    def invalidate(self, directory):
+        """Forget the listing of the directory
+
+        Args:
+            directory (str): directory to forget
+        """
+        directory = os.path.normpath(directory or ".")
+
+        with self._lock:
+            listing = self._listings.pop(directory, None)
+            if listing is not None:
+                self._entries -= len(listing.names)
+
+    def clear(self):
+        """Forget all listings"""
+        with self._lock:
+            self._listings.clear()
+            self._entries = 0
+
+    def get_stats(self):
+        """Get statistics of the cache
+
+        Returns:
+            dict: containing listings made and avoided, and amount of
+            directories and file names kept
+        """
+        with self._lock:
+            return {
+                "listings_made": self.listings_made,
+                "listings_avoided": self.listings_avoided,
+                "directories": len(self._listings),
+                "entries": self._entries,
+            }
+
+    def log_stats(self):
+        """Log how many listings have been avoided"""
+        stats = self.get_stats()
+        if stats["listings_made"] or stats["listings_avoided"]:
+            logger.debug(
+                "Directory listing cache: %(listings_made)s listings made, "
+                "%(listings_avoided)s avoided, %(directories)s directories "
+                "with %(entries)s entries" % stats
+            )
+
+    def __get_listing(self, directory, progress=None):
+        """Get valid listing of the directory, listing it if needed
+
+        Args:
+            directory (str): directory to list
+            progress (Progress, optional): progress of the task listing
+            the directory, used to stop when cancelled
+
+        Returns:
+            _Listing: listing of the directory
+        """
+        directory = os.path.normpath(directory or ".")
+
+        # A single stat tells if the listing is still valid
+        mtime = os.stat(directory).st_mtime
+
+        with self._lock:
+            listing = self._listings.get(directory)
+            if listing is not None and listing.mtime == mtime:
+                self._listings.move_to_end(directory)
+                self.listings_avoided += 1
+                return listing
+
+        names = []
+        with timer.span("filesystem.list"), os.scandir(directory) as entries:
+            for index, entry in enumerate(entries):
+                # Directories can be huge, so allow the user to stop
+                if progress is not None and not index % 1000:
+                    progress.check_cancelled()
+
+                # As the entries already know their type, no
+                # extra stat is done per file
+                if not entry.is_dir():
+                    names.append(entry.name)
+
+        listing = _Listing(mtime, tuple(names))
+
+        with self._lock:
+            self.listings_made += 1
+
+            # Directory could still be changing within the same timestamp
+            if time.time() - mtime < self.MTIME_GRANULARITY:
+                return listing
+
+            previous = self._listings.pop(directory, None)
+            if previous is not None:
+                self._entries -= len(previous.names)
+
+            self._listings[directory] = listing
+            self._entries += len(listing.names)
+
+            # Evict least recently used directories
+            while self._entries > self.max_entries and self._listings:
+                evicted_directory, evicted = self._listings.popitem(last=False)
+                self._entries -= len(evicted.names)
+
+        return listing
+
+
+# Shared by all handlers, as directories outlive the app instances
+directory_service = DirectoryService()
+directory_listings = DirectoryListingCache()
@@ -10,9 +10,27 @@
 
 import sgtk
 import nuke
+import json
 import os
 import re
-from .create_dialog import WriteNodePanel
+import time
+from .directories import directory_listings, directory_service
+from .knobs import KnobApplier
+from .manifest import create_manifest, get_manifest_path
+from .registry import WriteNodeRegistry
+from .scene import SceneRegistry
+from .sequences import (
+    FrameRange,
+    expand_views,
+    format_runs,
+    normalize_path,
+    scan_frames,
+    scan_sequences,
+)
+from .tasks import TaskRunner
+from .templates import ScriptContext, TemplatePathCache
+from .timing import timed, timer
+from .verify import FrameVerification, verify_frames
 
 # standard toolkit logger
 logger = sgtk.platform.get_logger(__name__)
@@ -25,8 +43,146 @@ class NukeWriteNodeHandler(object):
 
     def __init__(self):
         self.app = sgtk.platform.current_bundle()
-        self.sg = self.app.shotgun
 
+        # Timings of all operations, only recorded when enabled
+        self.timer = timer
+        self.__configure_timer()
+
+        # Compile the write node configurations once, so looking up
+        # the settings for a node doesn't scan all categories
+        self.registry = WriteNodeRegistry(self.app)
+
+        # Publish paths are calculated once per render path
+        self.template_paths = TemplatePathCache()
+
+        # Fields of the script path, parsed once per script load or save
+        self._script_context = None
+
+        # All publish lookups on ShotGrid go trough here, created on
+        # first use as batch sessions often never need it
+        self._published_files = None
+
+        # Runs slow lookups without freezing the user interface
+        self.tasks = TaskRunner()
+
+        # Only sets knobs of the internal Write node that changed
+        self.knobs = KnobApplier()
+
+        # Index of the write nodes in the current script
+        self.scene = SceneRegistry()
+        self.scene.rebuild()
+
+        # Nodes, result and latency of the last farm submission
+        self.last_farm_submission = None
+
+        # Callbacks are only added with a user interface
+        self._callbacks_added = False
+
+    @property
+    def sg(self):
+        """object: ShotGrid connection for the current thread"""
+        return self.app.shotgun
+
+    @property
+    def published_files(self):
+        """PublishedFileLookup: lookup for publishes on ShotGrid, or
+        PublishedFileIndex when the local publish index is enabled"""
+        if self._published_files is None:
+            from .publish import PublishedFileLookup
+
+            # Connection of the app is specific for the thread
+            # the lookup runs on
+            self._published_files = PublishedFileLookup(lambda: self.sg)
+
+            # Answer lookups from the index shared by all sessions,
+            # falling back to ShotGrid if it can't be used
+            index_path = self.__get_publish_index_path()
+            if index_path:
+                from .publish_index import PublishedFileIndex
+
+                self._published_files = PublishedFileIndex(
+                    lambda: self.sg,
+                    index_path,
+                    self.app.get_setting("publish_index_sync_interval", 30),
+                    fallback=self._published_files,
+                    # Lookups run on the main thread with a user interface,
+                    # so never keep the user waiting for an update
+                    background=self.tasks.is_interactive(),
+                )
+
+        return self._published_files
+
+    def refresh_published_files(self):
+        """Forget everything known about publishes, and rebuild the
+        local publish index if enabled"""
+        published_files = self.published_files
+        project_id = self.__get_project_id()
+
+        # Rebuilding fetches all publishes of the project
+        self.tasks.run(
+            "Refresh ShotGrid publishes",
+            lambda progress: published_files.refresh(project_id),
+            lambda result: logger.debug(
+                "Refreshed publishes of project %s" % project_id
+            ),
+        )
+
+    def __get_publish_index_path(self):
+        """Get path of the local publish index
+
+        Returns:
+            str: path of the database in the cache location of the app,
+            None if the index is disabled
+        """
+        if not self.app.get_setting("publish_index_enabled", False):
+            return None
+
+        # Cache location is specific for the site and project, and
+        # shared by all sessions of the user on the workstation
+        cache_location = getattr(self.app, "cache_location", None)
+        if not cache_location:
+            return None
+
+        return os.path.join(cache_location, "published_files.db")
+
+    @property
+    def script_context(self):
+        """ScriptContext: fields of the current script path"""
+        script_path = nuke.root().name()
+
+        # Compare the path as well, in case the script has been
+        # saved without triggering callbacks
+        if (
+            self._script_context is None
+            or self._script_context.path != script_path
+        ):
+            self._script_context = ScriptContext(
+                script_path, self.app.get_template("template_script_work")
+            )
+
+        return self._script_context
+
+    def reset_script_context(self):
+        """Forget fields of the script path, called whenever the
+        script has been loaded or saved"""
+        self._script_context = None
+
+    def reload_settings(self):
+        """Rebuild the write node configurations from the app settings,
+        needs to be called whenever the settings have been reloaded"""
+        self.registry.rebuild()
+        self.template_paths.clear()
+        self.reset_script_context()
+        self.__configure_timer()
+
+    def __configure_timer(self):
+        """Enable timing according to the app settings"""
+        self.timer.configure(
+            self.app.get_setting("timing_enabled", False),
+            self.app.get_setting("timing_log_path"),
+        )
+
+    @timed("render_local")
     def render_local(self, node):
         """Render the specified node.
         Will create paths and render
@@ -40,12 +196,124 @@ class NukeWriteNodeHandler(object):
 
         # If paths are set, render
         if prepared_write:
-            node.knob("Render").execute()
+
+            # Render the internal write node over a known range, so the
+            # same range can be verified afterwards
+            first_frame, last_frame = self.__get_frame_range(node)
+            with node:
+                write_node = nuke.toNode("Write1")
+
+            try:
+                nuke.execute(write_node, first_frame, last_frame, 1)
+                rendered = True
+
+            # Raised when the user cancelled, or the render failed
+            except RuntimeError as e:
+                logger.debug(
+                    "Could not render %s, because %s" % (node.name(), str(e))
+                )
+                rendered = False
+
+                # Directories could have been removed since they were
+                # created, so check them again on the next render
+                self.__forget_output_directories([node])
+
+                # Let user know the node has not been rendered
+                self.__show_failures("Could not render", {node.name(): str(e)})
+
+            # Rendered files could be published from now on
+            self.invalidate_published_status(node)
+
+            # Check all frames landed, without blocking the user
+            if rendered:
+                self.__verify_in_background([node], first_frame, last_frame)
 
         # If paths hasn't been set, let user know something went wrong
         else:
             nuke.message("Something went wrong.")
 
+    def render_selected(self):
+        """Render all selected ShotGrid write nodes locally at once,
+        so the shared upstream nodes are only processed once per frame
+        """
+        nodes = [
+            node
+            for node in nuke.selectedNodes()
+            if self.scene.is_write_node(node)
+        ]
+
+        if not nodes:
+            nuke.message("Please select one or more ShotGrid write nodes.")
+            return
+
+        self.render_multiple(nodes)
+
+    @timed("render_multiple")
+    def render_multiple(self, nodes, first_frame=None, last_frame=None):
+        """Render multiple nodes locally in a single execute pass.
+        Will create paths for all nodes and render the ones succeeded
+
+        Args:
+            nodes (list): nodes to render
+            first_frame (int, optional): first frame to render. Defaults to
+            the first frame of the script.
+            last_frame (int, optional): last frame to render. Defaults to
+            the last frame of the script.
+
+        Returns:
+            dict: containing node name with the error for nodes that
+            could not be prepared
+        """
+        prepared_nodes, failed_nodes = self.__prepare_writes(
+            nodes, "rendering"
+        )
+
+        if prepared_nodes:
+            root = nuke.root()
+            if first_frame is None:
+                first_frame = int(root.firstFrame())
+            if last_frame is None:
+                last_frame = int(root.lastFrame())
+
+            # Render the internal write nodes together over the same range
+            write_nodes = []
+            for node in prepared_nodes:
+                with node:
+                    write_nodes.append(nuke.toNode("Write1"))
+
+            try:
+                nuke.executeMultiple(
+                    write_nodes, ((first_frame, last_frame, 1),)
+                )
+                rendered = True
+
+            # Raised when the user cancelled, or the render failed
+            except RuntimeError as e:
+                logger.debug("Could not render nodes, because %s" % str(e))
+                rendered = False
+                for node in prepared_nodes:
+                    failed_nodes[node.name()] = str(e)
+
+                # Directories could have been removed since they were
+                # created, so check them again on the next render
+                self.__forget_output_directories(prepared_nodes)
+
+            # Rendered files could be published from now on
+            for node in prepared_nodes:
+                self.invalidate_published_status(node)
+
+            # Check all frames landed, without blocking the user
+            if rendered:
+                self.__verify_in_background(
+                    prepared_nodes, first_frame, last_frame
+                )
+
+        # Let user know which nodes have been skipped
+        self.__show_failures("Could not render", failed_nodes)
+
+        return failed_nodes
+
+    @timed("render_farm")
     def render_farm(self, node):
         """Submit the node to render on farm.
         Will create paths and submit
@@ -58,18 +326,124 @@ class NukeWriteNodeHandler(object):
         prepared_write = self.__prepare_write(node)
         if prepared_write:
 
-            # Using https://github.com/gillesvink/NukeDeadlineSubmission
-            import deadline_submission
-
             # Submit node for rendering on farm
-            submit = deadline_submission.DeadlineSubmission().submit(node)
+            failed_nodes = self.__submit_to_farm([node])
 
             # If submitted, increment save to not touch script while rendering
-            if submit:
+            if not failed_nodes:
                 self.__increment_save()
+
+            self.__show_failures("Could not submit", failed_nodes)
         else:
             nuke.message("Something went wrong.")
 
+    def render_farm_selected(self):
+        """Submit all selected ShotGrid write nodes to the farm at once"""
+        nodes = [
+            node
+            for node in nuke.selectedNodes()
+            if self.scene.is_write_node(node)
+        ]
+
+        if not nodes:
+            nuke.message("Please select one or more ShotGrid write nodes.")
+            return
+
+        self.render_farm_multiple(nodes)
+
+    @timed("render_farm_multiple")
+    def render_farm_multiple(self, nodes):
+        """Submit multiple nodes to render on farm as one batch.
+        Will create paths for all nodes, submit them together and
+        increment the script only once
+
+        Args:
+            nodes (list): nodes to submit to farm
+
+        Returns:
+            dict: containing node name with the error for nodes that
+            could not be prepared or submitted
+        """
+        prepared_nodes, failed_nodes = self.__prepare_writes(nodes, "farm")
+
+        if prepared_nodes:
+            submit_failures = self.__submit_to_farm(prepared_nodes)
+            failed_nodes.update(submit_failures)
+
+            # If any job is on the farm, increment save once to not touch
+            # the script it renders from
+            if len(submit_failures) < len(prepared_nodes):
+                self.__increment_save()
+
+        # Let user know which nodes have been skipped
+        self.__show_failures("Could not submit", failed_nodes)
+
+        return failed_nodes
+
+    def __forget_output_directories(self, nodes):
+        """Forget the output directories of the nodes are known to exist,
+        so they are created again if removed in the meantime
+
+        Args:
+            nodes (list): nodes to forget directories of
+        """
+        for node in nodes:
+            for path in self.get_output_paths(node):
+                directory_service.forget(os.path.dirname(path))
+
+    def __prepare_writes(self, nodes, purpose):
+        """Set paths for every node, a failing node shouldn't stop the
+        others
+
+        Args:
+            nodes (list): nodes to prepare
+            purpose (str): what the nodes are prepared for, used in the
+            log, e.g. rendering
+
+        Returns:
+            tuple: list of prepared nodes, and dictionary containing node
+            name with the error for nodes that could not be prepared
+        """
+        prepared_nodes = []
+        failed_nodes = {}
+
+        for node in nodes:
+            try:
+                if self.__prepare_write(node, interactive=False):
+                    prepared_nodes.append(node)
+                else:
+                    failed_nodes[node.name()] = "No configuration found"
+
+            except Exception as e:
+                logger.warning(
+                    "Could not prepare %s for %s, because %s"
+                    % (node.name(), purpose, str(e))
+                )
+                failed_nodes[node.name()] = str(e)
+
+        return prepared_nodes, failed_nodes
+
+    @staticmethod
+    def __show_failures(title, failed_nodes):
+        """Let user know which nodes have been skipped
+
+        Args:
+            title (str): first line of the message, e.g. Could not render
+            failed_nodes (dict): containing node name with the error
+        """
+        if failed_nodes:
+            nuke.message(
+                "%s:\n%s"
+                % (
+                    title,
+                    "\n".join(
+                        "%s: %s" % (name, error)
+                        for name, error in sorted(failed_nodes.items())
+                    ),
+                )
+            )
+
+    @timed("create_writenode")
     def create_writenode(self):
         """This function will use the Write Node create panel
         and set up the node correctly.
@@ -78,16 +452,8 @@ class NukeWriteNodeHandler(object):
         the user the already existing node.
         """
 
-        # Get all write nodes to check if the created name exists
-        write_nodes = self.get_all_write_nodes()
-
-        # Create initial list to add all names to
-        write_names = []
-        for node in write_nodes:
-            node = nuke.toNode(node)
-
-            # Append name to list
-            write_names.append(node["output"].value())
+        # Panel is only loaded when used, as it requires the user interface
+        from .create_dialog import WriteNodePanel
 
         # Get all options possible for write nodes
         write_node_settings = self.__get_write_node_options()
@@ -120,7 +486,7 @@ class NukeWriteNodeHandler(object):
                 return
 
             # If name already exists, show message and go to node
-            if output_name in write_names:
+            if self.scene.has_output(output_name):
                 nuke.message("Write node %s already existing." % output_name)
                 self.go_to_write_node(output_name)
                 return
@@ -165,34 +531,23 @@ class NukeWriteNodeHandler(object):
             knob (attribute): knob that has changed
         """
 
-        if knob.name() == "dataType":
+        if knob.name() == "name":
+            self.scene.rename(node)
+
+        elif knob.name() == "dataType":
             # Get the settings the node has to be set to
             configuration = self.__get_node_settings(node)
 
             # Get internal node settings
-            settings = configuration.get("settings")
+            settings = configuration.settings
 
             # Open to edit internal node
             with node:
                 # Get node attribute
                 write_node = nuke.toNode("Write1")
 
-                # Set file type
-                write_node["file_type"].setValue(
-                    configuration.get("file_type")
-                )
-
-                # Set all knob settings
-                for knob, setting in settings.items():
-
-                    try:
-                        write_node[knob].setValue(setting)
-
-                    except Exception as e:
-                        logger.debug(
-                            "Could not apply %s to the knob %s, because %s"
-                            % (setting, knob, str(e))
-                        )
+                # Set file type and all knob settings that changed
+                self.knobs.apply(write_node, configuration.file_type, settings)
 
             logger.debug("Updated node settings")
 
@@ -210,6 +565,7 @@ class NukeWriteNodeHandler(object):
         except Exception as error:
             nuke.message(str(error))
 
+    @timed("read_from_write")
     def read_from_write(self, node):
         """Create read node from node.
 
@@ -219,83 +575,554 @@ class NukeWriteNodeHandler(object):
             node (attribute): node to create read node from
         """
 
+        # Get render path
+        render_path = node["file"].value()
+
+        if render_path == "":
+            nuke.message(
+                "This write node has not rendered yet, please render"
+                " before create a read from this write node."
+            )
+            return
+
+        # Everything needed from the node is collected here, as the
+        # lookups run on a background thread
+        file_name = os.path.basename(render_path)
+        project_id = self.__get_project_id()
+        published_files = self.published_files
+        views = nuke.views()
+        try:
+            published_path = self.__get_published_path(node, render_path)
+        except Exception as e:
+            logger.debug(
+                "Could not calculate publish path for %s, because %s"
+                % (node.name(), str(e))
+            )
+            published_path = None
+
+        def find_frames(progress):
+            # Check for publish status, if it is published use publish path
+            progress.set_message("Checking publish status of %s" % file_name)
+            path = render_path
+            if published_path and published_files.find_one(
+                project_id, file_name
+            ):
+                path = published_path
+
+            # Get frames rendered for this sequence only, we will use
+            # them to get the first and last frame to set the read node.
+            # For multiple views, the frames of the first view are used.
+            frames = FrameRange.from_frames(
+                scan_frames(expand_views(path, views)[0], progress)
+            )
+
+            return path, frames
+
+        self.tasks.run(
+            "Create Read from %s" % node.name(),
+            find_frames,
+            lambda result: self.__create_read(node, *result),
+        )
+
+    @timed("verify_render")
+    def verify_render(self, node, first_frame=None, last_frame=None):
+        """Verify all frames of the node have been rendered, and store
+        the result on the node. Runs synchronously, so it can be used
+        without user interface, e.g. as post task on the farm.
+
+        Args:
+            node (attribute): node to verify
+            first_frame (int, optional): first frame expected. Defaults to
+            the frame range the node renders.
+            last_frame (int, optional): last frame expected. Defaults to
+            the frame range the node renders.
+
+        Returns:
+            FrameVerification: frames missing, empty or truncated
+        """
+        first_frame, last_frame = self.__get_frame_range(
+            node, first_frame, last_frame
+        )
+
+        # Every view and channel is written to its own sequence
+        verification = FrameVerification.combine(
+            node["file"].value(),
+            [
+                verify_frames(path, first_frame, last_frame)
+                for path in self.get_output_paths(node)
+            ],
+        )
+        self.__store_verification(node, verification)
+
+        return verification
+
+    @timed("create_manifest")
+    def create_manifest(self, node):
+        """Create manifest with the checksum of every rendered frame of
+        the node, written next to the frames. Runs in the background when
+        there is a user interface.
+
+        Args:
+            node (attribute): node to create manifest for
+        """
+        render_path = node["file"].value()
+
+        if render_path == "":
+            nuke.message(
+                "This write node has not rendered yet, please render"
+                " before creating a manifest."
+            )
+            return
+
+        # Every view and channel gets its own manifest
+        paths = self.get_output_paths(node)
+
+        def create_manifests(progress):
+            return [
+                (path, create_manifest(path, progress=progress))
+                for path in paths
+            ]
+
+        def report(manifests):
+            message = "\n".join(
+                "Created manifest of %s frames at %s"
+                % (len(manifest["frames"]), get_manifest_path(path))
+                for path, manifest in manifests
+            )
+            if self.tasks.is_interactive():
+                nuke.message(message)
+            else:
+                logger.info(message)
+
+        self.tasks.run(
+            "Create manifest of %s" % node.name(),
+            create_manifests,
+            report,
+        )
+
+    @staticmethod
+    def get_output_paths(node):
+        """Get path of every view and channel the node renders, as
+        calculated when the node was prepared for rendering
+
+        Args:
+            node (attribute): node to get paths of
+
+        Returns:
+            list: concrete paths written by the node
+        """
+        render_path = node["file"].value()
+
+        knob = node.knob("outputPaths")
+        if knob is not None and knob.value():
+            output_paths = json.loads(knob.value())
+
+            # Only valid as long as the path has not been changed
+            if output_paths.get("file") == render_path:
+                return output_paths["paths"]
+
+        return expand_views(render_path, nuke.views())
+
+    @staticmethod
+    def __store_output_paths(node, render_path, output_paths):
+        """Store paths of every view and channel on the node
+
+        Args:
+            node (attribute): node rendering the paths
+            render_path (str): path set on the node
+            output_paths (list): concrete paths written by the node
+        """
+
+        # Nodes created with an older gizmo don't have the knob
+        knob = node.knob("outputPaths")
+        if knob is not None:
+            knob.setValue(
+                json.dumps(
+                    {"file": render_path, "paths": output_paths},
+                    separators=(",", ":"),
+                )
+            )
+
+    @staticmethod
+    def get_verification(node):
+        """Get result of the last verification of the node
+
+        Args:
+            node (attribute): node to get verification of
+
+        Returns:
+            dict: containing path, frame range, and frame lists of the
+            missing, empty and truncated frames, None if the node
+            has not been verified
+        """
+        knob = node.knob("verification")
+        if knob is None or not knob.value():
+            return None
+
+        return json.loads(knob.value())
+
+    def __verify_in_background(self, nodes, first_frame=None, last_frame=None):
+        """Verify rendered frames of the nodes without blocking the user
+        interface, and let the user know about incomplete sequences
+
+        Args:
+            nodes (list): rendered nodes
+            first_frame (int, optional): first frame rendered. Defaults to
+            the frame range the node renders.
+            last_frame (int, optional): last frame rendered. Defaults to
+            the frame range the node renders.
+        """
+
+        # Everything needed from the nodes is collected here, as the
+        # verification runs on a background thread
+        sequences = []
+        for node in nodes:
+            sequences.append(
+                (node, node["file"].value(), self.get_output_paths(node))
+                + self.__get_frame_range(node, first_frame, last_frame)
+            )
+
+        def verify(progress):
+            results = []
+            for node, render_path, paths, first, last in sequences:
+                verification = FrameVerification.combine(
+                    render_path,
+                    [
+                        verify_frames(path, first, last, progress=progress)
+                        for path in paths
+                    ],
+                )
+                results.append((node, verification))
+
+            return results
+
+        def store(results):
+            incomplete = []
+            for node, verification in results:
+                if not self.__store_verification(node, verification):
+                    continue
+                if not verification.complete:
+                    incomplete.append(str(verification))
+
+            if not incomplete:
+                return
+
+            # Without user interface nobody can see a message
+            if self.tasks.is_interactive():
+                nuke.message("\n".join(incomplete))
+            else:
+                for message in incomplete:
+                    logger.warning(message)
+
+        self.tasks.run("Verify rendered frames", verify, store)
+
+    @staticmethod
+    def __store_verification(node, verification):
+        """Store compact result of the verification on the node
+
+        Args:
+            node (attribute): verified node
+            verification (FrameVerification): result to store
+
+        Returns:
+            bool: True if stored, False if the node has been deleted
+        """
+
+        # Node could have been deleted while verifying
+        try:
+            knob = node.knob("verification")
+        except ValueError:
+            return False
+
+        # Nodes created with an older gizmo don't have the knob
+        if knob is None:
+            logger.debug(
+                "Could not store verification on %s, because it has no "
+                "verification knob" % node.name()
+            )
+        else:
+            knob.setValue(verification.to_json())
+
+        return True
+
+    @staticmethod
+    def __get_frame_range(node, first_frame=None, last_frame=None):
+        """Get frame range the node renders, using the frame range of the
+        internal Write node if limited, otherwise of the script
+
+        Args:
+            node (attribute): node to get frame range of
+            first_frame (int, optional): first frame to use instead
+            last_frame (int, optional): last frame to use instead
+
+        Returns:
+            tuple: first and last frame
+        """
+        if first_frame is not None and last_frame is not None:
+            return first_frame, last_frame
+
+        with node:
+            write_node = nuke.toNode("Write1")
+            use_limit = write_node.knob("use_limit")
+
+            if use_limit is not None and use_limit.value():
+                frame_range = (
+                    int(write_node["first"].value()),
+                    int(write_node["last"].value()),
+                )
+            else:
+                root = nuke.root()
+                frame_range = (int(root.firstFrame()), int(root.lastFrame()))
+
+        if first_frame is None:
+            first_frame = frame_range[0]
+        if last_frame is None:
+            last_frame = frame_range[1]
+
+        return first_frame, last_frame
+
+    def __create_read(self, node, render_path, frames):
+        """Create read node underneath the node
+
+        Args:
+            node (attribute): node to create read node from
+            render_path (str): path to set on the read node
+            frames (FrameRange): frames found on disk
+        """
+
+        # Node could have been deleted while searching for frames
+        try:
+            node.name()
+        except ValueError:
+            return
+
+        # If no frames are found, the sequence doesn't exist (yet)
+        if not frames:
+            nuke.message("No rendered frames found for %s" % render_path)
+            return
+
+        self.__create_read_node(node, render_path, frames)
+
+        # Let user know the sequence is incomplete
+        missing_frames = frames.get_missing()
+        if missing_frames:
+            nuke.message(
+                "Frames %s are missing in %s"
+                % (format_runs(missing_frames), render_path)
+            )
+
+    def __create_read_node(self, node, render_path, frames, interactive=True):
+        """Create read node for the frames underneath the node
+
+        Args:
+            node (attribute): node to create read node from
+            render_path (str): path to set on the read node
+            frames (FrameRange): frames found on disk
+            interactive (bool, optional): create the node as if the user
+            created it, connected to the selection. Defaults to True.
+
+        Returns:
+            attribute: created read node
+        """
+
         # Make sure we are in nuke root level
         with nuke.root():
 
-            # Get render path
+            # Create read node, without updating the node graph
+            # when creating many nodes at once
+            if interactive:
+                read_node = nuke.createNode("Read")
+            else:
+                read_node = nuke.nodes.Read()
+
+            # Set path
+            read_node["file"].fromUserText(render_path)
+
+            # Set colorspace
+            read_node["colorspace"].setValue(self.get_colorspace(node))
+
+            # Set parameters
+            start_frame = frames.first
+            last_frame = frames.last
+
+            read_node["first"].setValue(start_frame)
+            read_node["origfirst"].setValue(start_frame)
+            read_node["last"].setValue(last_frame)
+            read_node["origlast"].setValue(last_frame)
+
+            # Set position
+            xpos = node.xpos()
+            ypos = node.ypos() + 50
+
+            read_node["xpos"].setValue(xpos)
+            read_node["ypos"].setValue(ypos)
+
+        return read_node
+
+    @timed("read_from_all_writes")
+    def read_from_all_writes(self):
+        """Create read nodes from all write nodes in the script that have
+        rendered. Every render directory is only scanned once, and the
+        directories are scanned in parallel.
+        """
+
+        # Everything needed from the nodes is collected here, as the
+        # lookups run on a background thread
+        sequences = []
+        for node_name in self.get_all_write_nodes():
+            node = nuke.toNode(node_name)
             render_path = node["file"].value()
+            if not render_path:
+                continue
 
-            if render_path == "":
-                nuke.message(
-                    "This write node has not rendered yet, please render"
-                    " before create a read from this write node."
+            try:
+                published_path = self.__get_published_path(node, render_path)
+            except Exception as e:
+                logger.debug(
+                    "Could not calculate publish path for %s, because %s"
+                    % (node.name(), str(e))
                 )
-                return
+                published_path = None
 
-            # Check for publish status
-            is_published = self.get_published_status(node)
+            sequences.append(
+                (
+                    node,
+                    os.path.basename(render_path),
+                    (render_path, published_path),
+                )
+            )
 
-            # If it is published, use publish path
-            if is_published:
-                render_path = self.__get_published_path(node, render_path)
+        if not sequences:
+            nuke.message("No ShotGrid write node has rendered yet.")
+            return
 
-            # Get directory for render
-            render_directory = os.path.dirname(render_path)
+        project_id = self.__get_project_id()
+        published_files = self.published_files
+        views = nuke.views()
 
-            # Get frame sequences from directory, we will use this function
-            # to get the first and last frame to set the read node
-            frame_sequences = self.__get_frame_sequences(render_directory)
+        def find_frames(progress):
+            # Check publish status of all outputs at once
+            progress.set_message("Checking publish status")
+            published = published_files.find_many(
+                project_id, [file_name for node, file_name, paths in sequences]
+            )
 
-            # Iterate trough all found frame sequences
-            for frame_sequence in frame_sequences:
-                sequence_path = frame_sequence[0].replace(os.sep, "/")
+            # Use publish path of published outputs
+            read_paths = []
+            for node, file_name, (render_path, published_path) in sequences:
+                if published_path and file_name in published:
+                    read_paths.append((node, published_path))
+                else:
+                    read_paths.append((node, render_path))
+
+            # For multiple views, the frames of the first view are used
+            frames = scan_sequences(
+                [expand_views(path, views)[0] for node, path in read_paths],
+                progress=progress,
+            )
 
-                # If sequence path matches render path we know this is the one
-                if sequence_path == render_path:
+            return [
+                (
+                    node,
+                    path,
+                    FrameRange.from_frames(
+                        frames[expand_views(path, views)[0]]
+                    ),
+                )
+                for node, path in read_paths
+            ]
 
-                    # Create read node
-                    read_node = nuke.createNode("Read")
+        self.tasks.run(
+            "Create Reads from ShotGrid writes",
+            find_frames,
+            self.__create_reads,
+        )
 
-                    # Set path
-                    read_node["file"].fromUserText(render_path)
+    def __create_reads(self, results):
+        """Create read nodes underneath the nodes in one undo step
 
-                    # Set colorspace
-                    read_node["colorspace"].setValue(self.get_colorspace(node))
+        Args:
+            results (list): containing node, path to set on the read node
+            and frames found on disk
+        """
+        problems = []
 
-                    # Set parameters
-                    start_frame = int(min(frame_sequence[1]))
-                    last_frame = int(max(frame_sequence[1]))
+        undo = nuke.Undo()
+        undo.begin("Create Reads from ShotGrid writes")
 
-                    read_node["first"].setValue(start_frame)
-                    read_node["origfirst"].setValue(start_frame)
-                    read_node["last"].setValue(last_frame)
-                    read_node["origlast"].setValue(last_frame)
+        try:
+            for node, render_path, frames in results:
 
-                    # Set position
-                    xpos = node.xpos()
-                    ypos = node.ypos() + 50
+                # Node could have been deleted while searching for frames
+                try:
+                    node.name()
+                except ValueError:
+                    continue
+
+                # If no frames are found, the sequence doesn't exist (yet)
+                if not frames:
+                    problems.append(
+                        "No rendered frames found for %s" % render_path
+                    )
+                    continue
 
-                    read_node["xpos"].setValue(xpos)
-                    read_node["ypos"].setValue(ypos)
+                self.__create_read_node(
+                    node, render_path, frames, interactive=False
+                )
 
+                missing_frames = frames.get_missing()
+                if missing_frames:
+                    problems.append(
+                        "Frames %s are missing in %s"
+                        % (format_runs(missing_frames), render_path)
+                    )
+
+        finally:
+            undo.end()
+
+        # Let user know about all incomplete sequences at once
+        if problems:
+            nuke.message("\n".join(problems))
+
+    @timed("convert_placeholder_nodes")
     def convert_placeholder_nodes(self):
         """Search existing placeholder nodes, and creates write nodes
         accordingly with the correct settings.
 
         This function can be used in templates to set write node types,
-        and create correct write nodes while loading script for first time"""
+        and create correct write nodes while loading script for first time
 
-        # Filter all nodes to scan for ModifyMetaData nodes
-        for placeholder_node in nuke.allNodes("ModifyMetaData"):
+        Returns:
+            dict: report containing the converted write node names and
+            the time spent converting
+        """
+        report = {"converted": [], "duration": 0.0}
+
+        # Only look at the names first, getting metadata is expensive
+        # If placeholder node starts with ShotGridWriteNodePlaceholder, we
+        # know this is the node we want to replace with a
+        # correct write node
+        placeholder_nodes = [
+            node
+            for node in nuke.allNodes("ModifyMetaData")
+            if node.name().startswith("ShotGridWriteNodePlaceholder")
+        ]
 
-            # If placeholder node starts with ShotGridWriteNodePlaceholder, we
-            # know this is the node we want to replace with a
-            # correct write node
-            if placeholder_node.name().startswith(
-                "ShotGridWriteNodePlaceholder"
-            ):
-                # Get write node settings
-                write_node_settings = self.__get_write_node_options()
+        # If no nodes have been found, skip conversion
+        if not placeholder_nodes:
+            return report
+
+        start_time = time.time()
+
+        # Get write node settings once for all placeholders
+        write_node_settings = self.__get_write_node_options()
+
+        # Convert all placeholders in a single undo step
+        undo = nuke.Undo()
+        undo.begin("Convert ShotGrid Write Node placeholders")
+
+        try:
+            for placeholder_node in placeholder_nodes:
 
                 # Get provided data from metadata node
                 metadata = placeholder_node.metadata()
@@ -306,47 +1133,90 @@ class NukeWriteNodeHandler(object):
                 # Get position and input data to replace node
                 placeholder_xpos = placeholder_node.xpos()
                 placeholder_ypos = placeholder_node.ypos()
-                placeholder_input = placeholder_node.input(0).name()
+                placeholder_input = placeholder_node.input(0)
 
                 # Delete the old node
                 nuke.delete(placeholder_node)
 
-                # Create write node
+                # Create write node without updating the node graph
                 write_node = self.__create_write(
-                    write_node_settings, category, output_name, data_type
+                    write_node_settings,
+                    category,
+                    output_name,
+                    data_type,
+                    interactive=False,
                 )
 
                 # Set position data
                 write_node["xpos"].setValue(placeholder_xpos)
                 write_node["ypos"].setValue(placeholder_ypos)
-                write_node.setInput(0, nuke.toNode(placeholder_input))
+                write_node.setInput(0, placeholder_input)
 
-            else:
-                # If no nodes have been found, skip conversion
-                logger.debug(
-                    "No ShotGrid Write Node placeholder node found, "
-                    "skipping conversion."
-                )
+                report["converted"].append(write_node.name())
+
+        finally:
+            undo.end()
+
+        report["duration"] = time.time() - start_time
+        logger.debug(
+            "Converted %s ShotGrid Write Node placeholders in %.3f seconds"
+            % (len(report["converted"]), report["duration"])
+        )
+
+        return report
 
     def add_callbacks(self):
         """Adds callbacks on script load"""
         nuke.addOnScriptLoad(self.convert_placeholder_nodes, nodeClass="Root")
+        nuke.addOnScriptLoad(self.reset_script_context, nodeClass="Root")
+        nuke.addOnScriptSave(self.reset_script_context, nodeClass="Root")
+        self.scene.add_callbacks()
+        self._callbacks_added = True
 
     def remove_callbacks(self):
         """Removes callbacks on destroy"""
-        nuke.removeOnScriptLoad(
-            self.convert_placeholder_nodes, nodeClass="Root"
-        )
+        if self._callbacks_added:
+            nuke.removeOnScriptLoad(
+                self.convert_placeholder_nodes, nodeClass="Root"
+            )
+            nuke.removeOnScriptLoad(
+                self.reset_script_context, nodeClass="Root"
+            )
+            nuke.removeOnScriptSave(
+                self.reset_script_context, nodeClass="Root"
+            )
+            self.scene.remove_callbacks()
+            self._callbacks_added = False
 
+        self.tasks.shutdown()
+        self.template_paths.log_stats()
+        directory_listings.log_stats()
+        directory_service.log_stats()
+        self.timer.flush()
+
+    @timed("update_read_nodes")
     def update_read_nodes(self):
         """Updates all read nodes to use published path instead
         of work path
+
+        Returns:
+            dict: report containing the updated read nodes with their old
+            and new path, and the write nodes that could not be resolved
+
+            For example: {
+            "updated": [("Read1", "/work/sh.%04d.exr", "/pub/sh.%04d.exr")],
+            "failed": ["sgWrite2"],
+            "unchanged": 12,
+        }
         """
+        report = {"updated": [], "failed": [], "unchanged": 0}
+
         # Get all write nodes, to retrieve rendered file paths
         write_nodes = self.get_all_write_nodes()
 
-        # Build dictionary containing both write node and file path
-        image_sequences = {}
+        # Build dictionary containing normalized render path with the
+        # publish path, so every publish path is only calculated once
+        published_paths = {}
 
         # Iterate trough all write nodes
         for write_node in write_nodes:
@@ -354,81 +1224,86 @@ class NukeWriteNodeHandler(object):
             # We only got a name, so we need to get the attributes
             write_node = nuke.toNode(write_node)
 
-            # Get render path
+            # Get render path, skip nodes that haven't rendered yet
             render_path = write_node["file"].value()
+            if not render_path:
+                continue
 
-            # Append write node to the rendered path
-            image_sequences[render_path] = write_node
+            try:
+                published_path = self.__get_published_path(
+                    write_node, render_path
+                )
 
-        # Filter for all read nodes
-        all_nodes = nuke.allNodes("Read")
+            except Exception as e:
+                logger.debug(
+                    "Could not calculate publish path for %s, because %s"
+                    % (write_node.name(), str(e))
+                )
+                report["failed"].append(write_node.name())
+                continue
 
-        # Iterate trough all read nodes
-        for node in all_nodes:
+            published_paths[normalize_path(render_path)] = published_path
 
-            # If path in read node is in the directory we just created
-            # set publish path
-            read_path = node["file"].value()
-            if read_path in image_sequences.keys():
+        # Nothing to do if no write node has rendered
+        if not published_paths:
+            return report
 
-                # Calculate publish path
-                write_node = image_sequences.get(read_path)
-                published_path = self.__get_published_path(
-                    write_node, read_path
-                )
+        # Update all read nodes in a single undo step
+        undo = nuke.Undo()
+        undo.begin("Update Read nodes to published paths")
+
+        try:
+            # Iterate trough all read nodes
+            for node in nuke.allNodes("Read"):
+
+                # If path in read node is rendered by one of the write
+                # nodes, set publish path
+                read_path = node["file"].value()
+                published_path = published_paths.get(normalize_path(read_path))
+
+                if published_path is None or published_path == read_path:
+                    report["unchanged"] += 1
+                    continue
 
                 # Set publish path to read node
                 node["file"].setValue(published_path)
+                report["updated"].append(
+                    (node.name(), read_path, published_path)
+                )
 
-    @staticmethod
-    def get_all_write_nodes():
+        finally:
+            undo.end()
+
+        logger.debug(
+            "Updated %s read nodes to published paths" % len(report["updated"])
+        )
+        self.template_paths.log_stats()
+
+        return report
+
+    def get_all_write_nodes(self):
         """Get all write nodes in list
 
         Returns:
             list: write nodes in current script
         """
 
-        # Find all groups in script
-        all_nodes = nuke.allNodes("Group")
-
-        # Create list to add nodes to
-        write_nodes = []
-
-        # Iterate trough all group nodes
-        for node in all_nodes:
-            # In the write nodes, we have a special knob
-            # to help identify this group as a write node
-            # If the group has the node "isShotGridWriteNode" we
-            # know this is a ShotGrid write node
-            if node.knob("isShotGridWriteNode"):
+        # Write nodes are indexed when created, so no need to
+        # search trough all groups in the script
+        return self.scene.get_node_names()
 
-                # If it is a ShotGrid write node, add it to the list
-                write_nodes.append(node.name())
-
-        return write_nodes
-
-    @staticmethod
-    def go_to_write_node(output_name):
+    def go_to_write_node(self, output_name):
         """Will move the DAG towards the write node using
         the specified output_name
 
         Args:
-            output_name (_type_): _description_
+            output_name (str): output name of the write node
         """
-        # Filter all nodes to search for group
-        all_nodes = nuke.allNodes("Group")
-        for node in all_nodes:
-
-            # If write node has "isShotGridWriteNode" knob, it
-            # is indeed a ShotGrid writenode
-            if node["isShotGridWriteNode"]:
+        node = self.scene.get_node_by_output(output_name)
+        if node:
 
-                # If the node has the specified output_name, we
-                # know this is the node we are search for
-                if node["output"].value() == output_name:
-
-                    # Position DAG to position of node
-                    nuke.zoom(3, [node.xpos(), node.ypos()])
+            # Position DAG to position of node
+            nuke.zoom(3, [node.xpos(), node.ypos()])
 
     def get_node_render_template(self, node):
         """Get  render template used by the specified node
@@ -440,16 +1315,11 @@ class NukeWriteNodeHandler(object):
             attribute: render template from templates.yml
         """
 
-        # Get configuration for node
+        # Get configuration for node, template is already
+        # resolved from templates.yml
         configuration = self.__get_node_settings(node)
 
-        # Get render template
-        render_template = configuration.get("render_template")
-
-        # Find template in templates.yml
-        render_template = self.app.get_template_by_name(render_template)
-
-        return render_template
+        return configuration.render_template
 
     def get_node_publish_template(self, node):
         """Get publish template used by the specified node
@@ -460,17 +1330,13 @@ class NukeWriteNodeHandler(object):
         Returns:
             attribute: publish template from templates.yml
         """
-        # Get configuration for node
+        # Get configuration for node, template is already
+        # resolved from templates.yml
         configuration = self.__get_node_settings(node)
 
-        # Get publish template
-        publish_template = configuration.get("publish_template")
-
-        # Find template in templates.yml
-        publish_template = self.app.get_template_by_name(publish_template)
-
-        return publish_template
+        return configuration.publish_template
 
+    @timed("get_published_status")
     def get_published_status(self, node):
         """This function will check on ShotGrid if there is a publish with
         exactly the same name on the project.
@@ -483,28 +1349,16 @@ class NukeWriteNodeHandler(object):
             "True", otherwise return a "False" value
         """
 
-        sg = self.sg
-
         # Get file path for node
         file_name = node["file"].value()
 
         # Get file name only
         file_name = os.path.basename(file_name)
 
-        # Get current project ID
-        current_engine = sgtk.platform.current_engine()
-        current_context = current_engine.context
-        project_id = current_context.project["id"]
-
-        # Create the filter to search on ShotGrid for
-        # publishes with the same file name
-        filters = [
-            ["project", "is", {"type": "Project", "id": project_id}],
-            ["code", "is", file_name],
-        ]
-
-        # Search on ShotGrid
-        published_file = sg.find_one("PublishedFile", filters)
+        # Search on ShotGrid for publishes with the same file name
+        published_file = self.published_files.find_one(
+            self.__get_project_id(), file_name
+        )
 
         # If there is no publish, it will return a None value.
         # So set the variable is_published to "False"
@@ -518,6 +1372,125 @@ class NukeWriteNodeHandler(object):
 
         return is_published
 
+    @timed("get_published_status_bulk")
+    def get_published_status_bulk(self, nodes):
+        """This function will check on ShotGrid for all nodes at once if
+        there is a publish with exactly the same name on the project.
+
+        Args:
+            nodes (list): nodes to retrieve publish status
+
+        Returns:
+            dict: containing node with the publish status, "True" if
+            there is a publish existing, otherwise a "False" value
+        """
+
+        # Get file name only for every node
+        file_names = {}
+        for node in nodes:
+            file_names[node] = os.path.basename(node["file"].value())
+
+        # Search on ShotGrid for all file names in as few queries
+        # as possible
+        published_files = self.published_files.find_many(
+            self.__get_project_id(), list(file_names.values())
+        )
+
+        published_status = {}
+        for node, file_name in file_names.items():
+            published_status[node] = file_name in published_files
+
+        return published_status
+
+    @timed("get_latest_versions")
+    def get_latest_versions(self, nodes):
+        """Find the latest published version of the output of every node,
+        using as few ShotGrid queries as possible
+
+        Args:
+            nodes (list): nodes to find the latest publish of
+
+        Returns:
+            dict: containing node with the published file entity of the
+            highest version, with code, version_number and path. None if
+            the output has never been published.
+        """
+        patterns = {}
+        for node in nodes:
+            try:
+                patterns[node] = self.__get_version_pattern(node)
+            except Exception as e:
+                logger.debug(
+                    "Could not get version pattern for %s, because %s"
+                    % (node.name(), str(e))
+                )
+                patterns[node] = None
+
+        # Search all outputs at once
+        latest = self.published_files.find_latest(
+            self.__get_project_id(),
+            [pattern for pattern in patterns.values() if pattern],
+        )
+
+        latest_versions = {}
+        for node, pattern in patterns.items():
+            latest_versions[node] = latest.get(pattern) if pattern else None
+
+        return latest_versions
+
+    def get_latest_version(self, node):
+        """Find the latest published version of the output of the node
+
+        Args:
+            node (attribute): node to find the latest publish of
+
+        Returns:
+            dict: published file entity of the highest version, None if
+            the output has never been published
+        """
+        return self.get_latest_versions([node])[node]
+
+    def invalidate_published_status(self, node):
+        """Forget the cached publish status of the node, needs to be
+        called whenever the node has been rendered or published
+
+        Args:
+            node (attribute): node to invalidate publish status
+        """
+        file_name = os.path.basename(node["file"].value())
+        self.published_files.invalidate(self.__get_project_id(), file_name)
+
+    def get_publish_cache_stats(self):
+        """Get statistics of the publish status cache, or of the local
+        publish index if enabled
+
+        Returns:
+            dict: containing hits, misses and amount of entries
+        """
+        return self.published_files.get_stats()
+
+    @staticmethod
+    def get_directory_listing_stats():
+        """Get statistics of the directory listing cache, shared by the
+        whole session
+
+        Returns:
+            dict: containing listings made and avoided, and amount of
+            directories and file names kept
+        """
+        return directory_listings.get_stats()
+
+    @staticmethod
+    def get_directory_service_stats():
+        """Get statistics of the directories known to exist, shared by
+        the whole session
+
+        Returns:
+            dict: containing file system calls made and avoided, and
+            amount of directories known to exist
+        """
+        return directory_service.get_stats()
+
     @staticmethod
     def get_colorspace(node):
         """Get colorspace node is rendering
@@ -538,7 +1511,12 @@ class NukeWriteNodeHandler(object):
             return colorspace
 
     def __create_write(
-        self, write_node_settings, category, output_name, data_type
+        self,
+        write_node_settings,
+        category,
+        output_name,
+        data_type,
+        interactive=True,
     ):
         """Create write node using specified settings
 
@@ -547,16 +1525,23 @@ class NukeWriteNodeHandler(object):
             category (str): category user has chosen to setup node
             output_name (str): output name to render
             data_type (str): datatype to use
+            interactive (bool, optional): place the node in the node graph
+            and open its panel, as if the user created it. Defaults to True.
 
         Returns:
             attribute: created write node
         """
 
-        # Create write node
-        created_write = nuke.createNode("sgWrite")
+        # Create write node, without placing it and opening the panel
+        # when created from code, as that updates the user interface
+        if interactive:
+            created_write = nuke.createNode("sgWrite")
+        else:
+            created_write = nuke.nodes.sgWrite()
 
         # Set output knob value to use specified output_name
         created_write["output"].setValue(output_name)
+        self.scene.update(created_write)
 
         # Get all categories and add to knob
         categories = []
@@ -577,30 +1562,18 @@ class NukeWriteNodeHandler(object):
 
         # Get the settings the node has to be set to
         configuration = self.__get_node_settings(created_write)
-        created_write["tile_color"].setValue(configuration.get("tile_color"))
+        created_write["tile_color"].setValue(configuration.tile_color)
 
         # Get internal node settings
-        settings = configuration.get("settings")
+        settings = configuration.settings
 
         # Open to edit internal node
         with created_write:
             # Get node attribute
             write_node = nuke.toNode("Write1")
 
-            # Set file type
-            write_node["file_type"].setValue(configuration.get("file_type"))
-
-            # Set all knob settings
-            for knob, setting in settings.items():
-
-                try:
-                    write_node[knob].setValue(setting)
-
-                except Exception as e:
-                    logger.debug(
-                        "Could not apply %s to the knob %s, because %s"
-                        % (setting, knob, str(e))
-                    )
+            # Set file type and all knob settings that changed
+            self.knobs.apply(write_node, configuration.file_type, settings)
 
         return created_write
 
@@ -622,86 +1595,74 @@ class NukeWriteNodeHandler(object):
         }
         """
 
-        # Get categories from settings
-        categories = self.app.get_setting("categories")
-
-        # Create initial dictionary to add settings to
-        write_node_settings = {}
-        for category in categories:
-
-            # Get category name
-            category_name = category.get("category_name")
+        # Options are compiled together with the configurations
+        return self.registry.get_options()
 
-            # Get write node names
-            write_nodes = category.get("write_nodes")
-            write_node_names = []
-            for write_node in write_nodes:
-                write_node_name = write_node.get("name")
-                write_node_names.append(write_node_name)
-
-            # Add list with names to category
-            write_node_settings[category_name] = write_node_names
-
-        return write_node_settings
-
-    def __get_latest_version(self, node):
-        """This function will check on ShotGrid if there is a publish with
-        exactly the same name on the project.
+    def __get_version_pattern(self, node):
+        """Get version agnostic code of the output of the node, using the
+        publish template with the fields of the render path
 
         Args:
-            node (attribute): node to retrieve publish status
+            node (attribute): node to get the pattern for
 
         Returns:
-            bool: If there is a publish existing it will return
-            "True", otherwise return a "False" value
+            VersionPattern: pattern matching the codes of every version
         """
+        from .publish import VersionPattern
 
-        sg = self.sg
-
-        # Get file path for node
-        file_name = node["file"].value()
+        configuration = self.__get_node_settings(node)
+        fields = self.template_paths.get_fields(
+            configuration.render_template, node["file"].value()
+        )
 
-        # Get file name only
-        file_name = os.path.basename(file_name)
+        # Versions with a different first and last digit, and amount of
+        # digits, show where the version is in the code
+        codes = []
+        for version in (1, 9999, fields["version"]):
+            fields["version"] = version
+            codes.append(
+                os.path.basename(
+                    configuration.publish_template.apply_fields(fields)
+                )
+            )
 
-        # Get current project ID
-        current_engine = sgtk.platform.current_engine()
-        current_context = current_engine.context
-        project_id = current_context.project["id"]
+        pattern = VersionPattern.from_codes(codes[0], codes[1])
 
-        # Create the filter to search on ShotGrid for
-        # publishes with the same file name
-        filters = [
-            ["project", "is", {"type": "Project", "id": project_id}],
-            ["code", "is", file_name],
-        ]
+        # Other fields depend on the version as well, so only the
+        # current version can be found
+        if pattern is None:
+            logger.debug(
+                "Could not find version in %s, only matching the current "
+                "version" % codes[2]
+            )
+            pattern = VersionPattern(codes[2])
 
-        # Search on ShotGrid
-        published_file = sg.find_one("PublishedFile", filters)
+        return pattern
 
-        # If there is no publish, it will return a None value.
-        # So set the variable is_published to "False"
-        if published_file is None:
-            is_published = False
+    @staticmethod
+    def __get_project_id():
+        """Get id of the project in the current context
 
-        # If the value is not None, there is a publish with the same name.
-        # So set the variable is_published to "True"
-        else:
-            is_published = True
+        Returns:
+            int: current project id
+        """
+        current_engine = sgtk.platform.current_engine()
+        current_context = current_engine.context
 
-        return is_published
+        return current_context.project["id"]
 
     def __get_node_settings(self, node):
-        """This function will go trough the dictionary to get the correct
-        configuration dictionary matching the settings of the node
+        """This function will look up the configuration matching
+        the settings of the node
 
         Args:
             node (attribute): node to setup
 
         Returns:
-            dict: containing all settings to set write node
+            WriteNodeConfiguration: containing all settings to set write node,
+            None if no configuration matches the node
 
-            For example: {
+            For example the configuration for: {
             "name": "exr (dwaa 16bit)",
             "file_type": "exr",
             "render_template": "nuke_shot_render_work",
@@ -720,63 +1681,89 @@ class NukeWriteNodeHandler(object):
         write_category = node["category"].value()
         data_type = node["dataType"].value()
 
-        categories = self.app.get_setting("categories")
+        return self.registry.get(write_category, data_type)
 
-        # Iterate trough all categories to find our category
-        for category in categories:
+    @timed("template.calculate_output_paths")
+    def __calculate_output_paths(self, node, configuration, version_offset=0):
+        """Calculate write path, and the path of every view the node
+        renders, in a single pass
 
-            # If category name matches our name, it is the category
-            if category.get("category_name") == write_category:
-
-                # Search trough all possible write nodes
-                for write_node in category.get("write_nodes"):
+        Args:
+            node (attribute): node to calculate paths
+            configuration (WriteNodeConfiguration): configuration
+            containing template
+            version_offset (int, optional): amount to add to the script
+            version, e.g. 1 for the next version. Defaults to 0.
 
-                    # If write node matches our data type, we need
-                    # these settings
-                    if write_node.get("name") == data_type:
+        Returns:
+            tuple: file path for rendering, and list of the concrete
+            paths written for every view
+        """
+        fields, views = self.__get_output_fields(
+            node, configuration.render_template
+        )
+        render_path = self.script_context.get_render_path(
+            configuration.render_template,
+            node["output"].value(),
+            version_offset,
+            fields,
+        )
 
-                        return write_node
+        return render_path, expand_views(render_path, views)
 
-    def __calculate_path(self, node, configuration):
-        """Calculate write path using template provided in configuration
+    @staticmethod
+    def __get_output_fields(node, render_template):
+        """Get fields of the node used by the render template, besides
+        the fields of the script and the output name
 
         Args:
-            node (attribute): node to calculate path
-            configuration (dict): configuration containing template
+            node (attribute): node to get fields of
+            render_template (TemplatePath): template of the render path
 
         Returns:
-            str: file path for rendering
+            tuple: dictionary with the eye, channel, width and height
+            fields used by the template, and list of the views rendered
         """
+        keys = render_template.keys
+        fields = {}
+        views = []
 
-        # Get render template from settings
-        render_template = configuration.get("render_template")
+        # Most templates use none of these fields
+        if not any(
+            key in keys for key in ("eye", "channel", "width", "height")
+        ):
+            return fields, views
 
-        # Search for render template in templates.yml
-        render_template = self.app.get_template_by_name(render_template)
-
-        # Get script template
-        script_template = self.app.get_template("template_script_work")
+        with node:
+            write_node = nuke.toNode("Write1")
 
-        # Get values for fields
-        current_file = nuke.root().name()
+            if "channel" in keys:
+                fields["channel"] = write_node["channels"].value()
 
-        # Get fields already set by script path
-        fields = script_template.get_fields(current_file)
+            if "width" in keys or "height" in keys:
+                fields["width"] = node.width()
+                fields["height"] = node.height()
 
-        fields["SEQ"] = "FORMAT: %d"
-        fields["output"] = node["output"].value()
+            # Nuke replaces %V with the view while rendering
+            if "eye" in keys:
+                fields["eye"] = "%V"
 
-        # Calculate path
-        render_path = render_template.apply_fields(fields).replace(os.sep, "/")
+                views_knob = write_node.knob("views")
+                if views_knob is not None:
+                    views = views_knob.value().split()
+                views = views or nuke.views()
 
-        return render_path
+        return fields, views
 
-    def __prepare_write(self, node):
+    @timed("prepare_write")
+    def __prepare_write(self, node, interactive=True):
         """Set all parameters when rendering.
         Will calculate paths and set them
 
         Args:
             node (attribute): node to process
+            interactive (bool, optional): show a message if the node could
+            not be processed. Defaults to True.
 
         Returns:
             bool: returns True if processing is completed, False if failed
@@ -785,58 +1772,138 @@ class NukeWriteNodeHandler(object):
         # Get node settings for selected node
         configuration = self.__get_node_settings(node)
         if configuration:
-            # Get render path
-            render_path = self.__calculate_path(node, configuration)
-            settings = configuration.get("settings")
+            # Get render path, and the path of every view rendered
+            render_path, output_paths = self.__calculate_output_paths(
+                node, configuration
+            )
+            settings = configuration.settings
 
             # Now we have all the parameters necessary, lets set them
             with node:
 
                 write_node = nuke.toNode("Write1")
                 write_node["file"].setValue(render_path)
-                for knob, setting in settings.items():
 
-                    # Prevent to change the channels knob
-                    if not knob == "channels":
-                        write_node[knob].setValue(setting)
+                # Prevent to change the channels knob
+                self.knobs.apply(
+                    write_node, None, settings, exclude=("channels",)
+                )
+
+            # Remember the paths, so they don't need to be calculated
+            # again when scanning or verifying
+            self.__store_output_paths(node, render_path, output_paths)
 
-            # Make sure directory exists
-            render_directory = os.path.dirname(render_path)
+            # Make sure directories of all views exist at the same time,
+            # directories created before are remembered so they don't
+            # need to be checked again
+            directory_service.ensure_all(
+                os.path.dirname(path) for path in output_paths
+            )
 
-            # If directory doesn't exist, create it
-            if not os.path.isdir(render_directory):
-                os.makedirs(render_directory)
+            # The script is saved as next version after rendering on farm,
+            # so already create the directories for the next render
+            (
+                next_render_path,
+                next_output_paths,
+            ) = self.__calculate_output_paths(
+                node, configuration, version_offset=1
+            )
+            for directory in set(
+                os.path.dirname(path) for path in next_output_paths
+            ):
+                directory_service.ensure_async(directory)
 
             return True
 
         else:
-            nuke.message(
+            message = (
                 "Could not find configuration for node %s"
                 % node["name"].value()
             )
+            if interactive:
+                nuke.message(message)
+            else:
+                logger.warning(message)
+
             return False
 
-    def __increment_save(self):
-        """Increment save the current script"""
+    def __submit_to_farm(self, nodes):
+        """Submit prepared nodes to the farm as one batch, with a job
+        for every node
 
-        # Get script template
-        script_template = self.app.get_template("template_script_work")
-        script_file = nuke.root().name()
+        Args:
+            nodes (list): prepared nodes to submit
 
-        # Get fields
-        fields = script_template.get_fields(script_file)
+        Returns:
+            dict: containing node name with the error for nodes that
+            could not be submitted, empty if all have been submitted
+        """
 
-        # Increment version number
-        fields["version"] = fields["version"] + 1
+        # Using https://github.com/gillesvink/NukeDeadlineSubmission
+        import deadline_submission
 
-        # Calculate path
-        new_script_file = script_template.apply_fields(fields).replace(
-            os.sep, "/"
+        submission = deadline_submission.DeadlineSubmission()
+        start_time = time.time()
+        failed_nodes = {}
+
+        # The submitter creates one job per node, so the batch is one
+        # preparation pass and one increment, a failing node shouldn't
+        # stop the others
+        with self.timer.span("farm.submit"):
+            for node in nodes:
+                try:
+                    if not submission.submit(node):
+                        failed_nodes[node.name()] = "Submission failed"
+                except Exception as e:
+                    failed_nodes[node.name()] = str(e)
+
+        submitted_nodes = [
+            node for node in nodes if node.name() not in failed_nodes
+        ]
+        self.last_farm_submission = {
+            "nodes": [node.name() for node in nodes],
+            "submitted": bool(submitted_nodes),
+            "failed": sorted(failed_nodes),
+            "latency": time.time() - start_time,
+        }
+        logger.info(
+            "Submitted %s of %s nodes to farm in %.2f seconds"
+            % (
+                len(submitted_nodes),
+                len(nodes),
+                self.last_farm_submission["latency"],
+            )
         )
+        for name, error in sorted(failed_nodes.items()):
+            logger.warning(
+                "Could not submit %s to farm, because %s" % (name, error)
+            )
+
+        # Rendered files could be published from now on
+        for node in submitted_nodes:
+            self.invalidate_published_status(node)
+
+        return failed_nodes
+
+    def __increment_save(self):
+        """Increment save the current script"""
+
+        # Get current and incremented path from the script fields
+        script_context = self.script_context
+        script_file = script_context.path
+        new_script_file = script_context.get_script_path(version_offset=1)
 
         # Save script with incremented path
         nuke.scriptSaveAs(new_script_file)
 
+        # Both script versions could be published from now on
+        project_id = self.__get_project_id()
+        for file_name in (script_file, new_script_file):
+            self.published_files.invalidate(
+                project_id, os.path.basename(file_name)
+            )
+
+    @timed("template.published_path")
     def __get_published_path(self, node, path):
         """Calculate path for published render path
 
@@ -847,101 +1914,13 @@ class NukeWriteNodeHandler(object):
         Returns:
             str: path used for publishing
         """
-        # Get render template and get fields from it
-        render_template = self.get_node_render_template(node)
-        render_fields = render_template.get_fields(path)
-
-        # Get publish template
-        publish_template = self.get_node_publish_template(node)
+        # Get render and publish template
+        configuration = self.__get_node_settings(node)
 
-        # Calculate path with fields from render path
-        publish_path = publish_template.apply_fields(render_fields).replace(
-            os.sep, "/"
+        # Calculate path with fields from render path, only
+        # once for every render path
+        return self.template_paths.get_published_path(
+            configuration.render_template,
+            configuration.publish_template,
+            path,
         )
-
-        return publish_path
-
-    @staticmethod
-    def __get_frame_sequences(folder, extensions=None, frame_spec=None):
-        """Copied from the publisher app, and customized to return
-        file sequences with frame lists instead of filenames
-
-        Args:
-            folder (str): folder to scan for frame sequences
-            extensions (str, optional): extension to search for. Defaults
-            to None (all).
-            frame_spec (str, optional): if required another frame spec
-            can be used
-            for returning. Defaults to None (%04d).
-
-        Returns:
-            list: containing all frame sequences in specified folder
-        """
-
-        FRAME_REGEX = re.compile(r"(.*)([._-])(\d+)\.([^.]+)$", re.IGNORECASE)
-
-        # list of already processed file names
-        processed_names = {}
-
-        # examine the files in the folder
-        for filename in os.listdir(folder):
-            file_path = os.path.join(folder, filename)
-
-            if os.path.isdir(file_path):
-                # ignore subfolders
-                continue
-
-            # see if there is a frame number
-            frame_pattern_match = re.search(FRAME_REGEX, filename)
-
-            if not frame_pattern_match:
-                # no frame number detected. carry on.
-                continue
-
-            prefix = frame_pattern_match.group(1)
-            frame_sep = frame_pattern_match.group(2)
-            frame_str = frame_pattern_match.group(3)
-            extension = frame_pattern_match.group(4) or ""
-
-            # filename without a frame number.
-            file_no_frame = "%s.%s" % (prefix, extension)
-
-            if file_no_frame in processed_names:
-                # already processed this sequence. add the framenumber to the list, later we can use this to
-                # determine the framerange
-                processed_names[file_no_frame]["frame_list"].append(frame_str)
-                continue
-
-            if extensions and extension not in extensions:
-                # not one of the extensions supplied
-                continue
-
-            # make sure we maintain the same padding
-            if not frame_spec:
-                padding = len(frame_str)
-                frame_spec = "%%0%dd" % (padding,)
-
-            seq_filename = "%s%s%s" % (prefix, frame_sep, frame_spec)
-
-            if extension:
-                seq_filename = "%s.%s" % (seq_filename, extension)
-
-            # build the path in the same folder
-            seq_path = os.path.join(folder, seq_filename)
-
-            # remember each seq path identified and a list of files matching the
-            # seq pattern
-            processed_names[file_no_frame] = {
-                "sequence_path": seq_path,
-                "frame_list": [frame_str],
-            }
-
-        # build the final list of sequence paths to return
-        frame_sequences = []
-        for file_no_frame in processed_names:
-            seq_info = processed_names[file_no_frame]
-            seq_path = seq_info["sequence_path"]
-
-            frame_sequences.append((seq_path, seq_info["frame_list"]))
-
-        return frame_sequences
@@ -0,0 +1,126 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+from .timing import timed
+
+# standard toolkit logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+class KnobApplier(object):
+    """
+    Applies configuration settings to a Write node, only setting knobs
+    that don't have the correct value yet
+    """
+
+    def __init__(self):
+        # Knob names available on the Write node per file type
+        self._knob_names = {}
+
+        # Counters to see how many knobs didn't need to be set
+        self.knobs_set = 0
+        self.knobs_skipped = 0
+        self.knobs_missing = 0
+
+    @timed("knobs.apply")
+    def apply(self, write_node, file_type, settings, exclude=()):
+        """Apply file type and settings to the Write node. File type is
+        set first, as it determines which knobs are available.
+
+        Args:
+            write_node (attribute): Write node to apply settings to
+            file_type (str): file type to set, None to keep the current
+            settings (dict): knob names with the value to set
+            exclude (tuple, optional): knob names not to touch
+
+        Returns:
+            list: names of the knobs that have been set
+        """
+        changed = []
+
+        if file_type is None:
+            file_type = write_node["file_type"].value()
+        elif self.__set(write_node["file_type"], file_type):
+            changed.append("file_type")
+
+        knob_names = self.__get_knob_names(write_node, file_type)
+
+        # Use order of the configuration, so the result is stable
+        for knob_name, setting in settings.items():
+            if knob_name in exclude:
+                continue
+
+            if knob_name not in knob_names:
+                self.knobs_missing += 1
+                logger.debug(
+                    "Could not apply %s to the knob %s, because it doesn't "
+                    "exist for %s" % (setting, knob_name, file_type)
+                )
+                continue
+
+            try:
+                if self.__set(write_node[knob_name], setting):
+                    changed.append(knob_name)
+
+            except Exception as e:
+                logger.debug(
+                    "Could not apply %s to the knob %s, because %s"
+                    % (setting, knob_name, str(e))
+                )
+
+        return changed
+
+    def get_stats(self):
+        """Get statistics of the applied knobs
+
+        Returns:
+            dict: containing amount of knobs set, skipped and missing
+        """
+        return {
+            "knobs_set": self.knobs_set,
+            "knobs_skipped": self.knobs_skipped,
+            "knobs_missing": self.knobs_missing,
+        }
+
+    def __get_knob_names(self, write_node, file_type):
+        """Get names of the knobs available for the file type
+
+        Args:
+            write_node (attribute): Write node set to the file type
+            file_type (str): file type of the Write node
+
+        Returns:
+            set: available knob names
+        """
+        knob_names = self._knob_names.get(file_type)
+        if knob_names is None:
+            knob_names = set(write_node.knobs().keys())
+            self._knob_names[file_type] = knob_names
+
+        return knob_names
+
+    def __set(self, knob, value):
+        """Set value on the knob if it is different
+
+        Args:
+            knob (attribute): knob to set
+            value (object): value to set
+
+        Returns:
+            bool: True if the value has been set
+        """
+        if knob.value() == value:
+            self.knobs_skipped += 1
+            return False
+
+        knob.setValue(value)
+        self.knobs_set += 1
+        return True
@@ -0,0 +1,245 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from .sequences import SequencePattern, scan_frames
+from .tasks import TaskCancelled
+from .timing import timed
+
+# standard toolkit logger
+logger = sgtk.platform.get_logger(__name__)
+
+# Size of the blocks read from a file, so memory use doesn't
+# depend on the size of the frames
+CHUNK_SIZE = 1024 * 1024
+
+
+def get_manifest_path(path):
+    """Get path of the manifest belonging to the sequence, stored next
+    to the frames, e.g. /renders/comp.manifest.json
+
+    Args:
+        path (str): sequence path, e.g. /renders/comp.%04d.exr
+
+    Returns:
+        str: path of the manifest
+    """
+    pattern = SequencePattern.from_path(path)
+    if pattern is None:
+        raise ValueError("%s is not a frame sequence" % path)
+
+    name = pattern.prefix.rstrip("._-") or "sequence"
+
+    return os.path.join(pattern.directory, "%s.manifest.json" % name)
+
+
+def hash_file(path, algorithm="sha256", chunk_size=CHUNK_SIZE):
+    """Hash the file by streaming it in blocks
+
+    Args:
+        path (str): file to hash
+        algorithm (str, optional): hashlib algorithm. Defaults to sha256.
+        chunk_size (int, optional): amount of bytes read at once
+
+    Returns:
+        str: hex digest of the file
+    """
+    checksum = hashlib.new(algorithm)
+    with open(path, "rb") as frame_file:
+        for chunk in iter(lambda: frame_file.read(chunk_size), b""):
+            checksum.update(chunk)
+
+    return checksum.hexdigest()
+
+
+def load_manifest(manifest_path):
+    """Load manifest written before
+
+    Args:
+        manifest_path (str): path of the manifest
+
+    Returns:
+        dict: manifest, None if it doesn't exist or can't be read
+    """
+    try:
+        with open(manifest_path, "r") as manifest_file:
+            return json.load(manifest_file)
+
+    except (IOError, OSError, ValueError) as e:
+        if os.path.exists(manifest_path):
+            logger.debug(
+                "Could not read manifest %s, because %s"
+                % (manifest_path, str(e))
+            )
+        return None
+
+
+def _write_manifest(manifest_path, manifest):
+    """Write manifest, replacing the existing one at once so readers
+    never see a partially written manifest
+
+    Args:
+        manifest_path (str): path of the manifest
+        manifest (dict): manifest to write
+    """
+    temporary_path = "%s.%s.tmp" % (manifest_path, os.getpid())
+    with open(temporary_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+
+    os.replace(temporary_path, manifest_path)
+
+
+@timed("filesystem.create_manifest")
+def create_manifest(
+    path,
+    frames=None,
+    algorithm="sha256",
+    max_workers=None,
+    processes=False,
+    progress=None,
+):
+    """Create manifest with the checksum of every frame of the sequence,
+    and write it next to the frames. Frames with the same size and
+    modification time as in the existing manifest are not hashed again.
+
+    Frames are hashed in parallel, by threads as hashlib releases the
+    GIL while hashing, or by processes when running standalone. Only a
+    limited amount of frames is in flight at once, so memory stays
+    bounded for any length of sequence.
+
+    Args:
+        path (str): sequence path, e.g. /renders/comp.%04d.exr
+        frames (iterable, optional): frames to hash. Defaults to the
+        frames found on disk.
+        algorithm (str, optional): hashlib algorithm. Defaults to sha256.
+        max_workers (int, optional): amount of threads or processes.
+        Defaults to the amount of CPUs.
+        processes (bool, optional): hash using processes instead of
+        threads. Should not be used inside Nuke, as it would start new
+        Nuke processes. Defaults to False.
+        progress (Progress, optional): progress of the task creating the
+        manifest, used to report and stop when cancelled
+
+    Returns:
+        dict: the manifest written, containing the algorithm, and every
+        frame with its size, modification time and checksum
+    """
+    manifest_path = get_manifest_path(path)
+    pattern = SequencePattern.from_path(path)
+    if frames is None:
+        frames = scan_frames(path, progress)
+
+    # Entries of the existing manifest can be reused
+    # as long as the frame didn't change
+    previous = load_manifest(manifest_path) or {}
+    previous_frames = {}
+    if previous.get("algorithm") == algorithm:
+        previous_frames = previous.get("frames", {})
+
+    start_time = time.time()
+    entries = {}
+    pending = []
+    for frame in frames:
+        try:
+            stat = os.stat(pattern.get_path(frame))
+        except OSError as e:
+            logger.debug(
+                "Could not add frame %s to the manifest, because %s"
+                % (frame, str(e))
+            )
+            continue
+
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime}
+        previous_entry = previous_frames.get(str(frame))
+        if (
+            previous_entry
+            and previous_entry.get("size") == entry["size"]
+            and previous_entry.get("mtime") == entry["mtime"]
+        ):
+            entry["hash"] = previous_entry["hash"]
+        else:
+            pending.append(frame)
+
+        entries[str(frame)] = entry
+
+    if progress is not None:
+        progress.set_message(
+            "Hashing %s frames of %s" % (len(pending), os.path.basename(path))
+        )
+
+    max_workers = max_workers or os.cpu_count() or 1
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+
+    hashed = 0
+    with executor_class(max_workers=max_workers) as executor:
+        frames_left = iter(pending)
+        running = {}
+
+        try:
+            while True:
+                # Keep a limited amount of frames in flight
+                for frame in frames_left:
+                    future = executor.submit(
+                        hash_file, pattern.get_path(frame), algorithm
+                    )
+                    running[future] = frame
+                    if len(running) >= max_workers * 2:
+                        break
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    frame = str(running.pop(future))
+                    hashed += 1
+
+                    # Frame could have been removed in the meantime
+                    try:
+                        entries[frame]["hash"] = future.result()
+                    except (IOError, OSError) as e:
+                        logger.debug(
+                            "Could not hash frame %s, because %s"
+                            % (frame, str(e))
+                        )
+                        del entries[frame]
+
+                if progress is not None:
+                    progress.check_cancelled()
+                    progress.set_progress(100.0 * hashed / len(pending))
+
+        except TaskCancelled:
+            for future in running:
+                future.cancel()
+            raise
+
+    manifest = {
+        "path": path,
+        "algorithm": algorithm,
+        "frames": entries,
+    }
+    _write_manifest(manifest_path, manifest)
+
+    logger.debug(
+        "Created manifest %s, hashed %s of %s frames in %.3f seconds"
+        % (manifest_path, hashed, len(entries), time.time() - start_time)
+    )
+
+    return manifest
@@ -0,0 +1,541 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+import re
+import threading
+import time
+from collections import OrderedDict
+from .timing import timer
+
+# standard toolkit logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+class PublishedFileCache(object):
+    """
+    In memory cache of publish lookups per project, with expiry and
+    least recently used eviction. Stores both found publishes and
+    codes without a publish.
+    """
+
+    # Returned by get when there is no valid cache entry
+    MISSING = object()
+
+    def __init__(self, ttl=60.0, max_size=2048):
+        """Cache with the specified limits
+
+        Args:
+            ttl (float, optional): seconds an entry stays valid. Defaults
+            to 60 seconds.
+            max_size (int, optional): maximum amount of entries. Defaults
+            to 2048.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+        # Lookups run on background threads as well
+        self._lock = threading.Lock()
+
+        # Counters to see how effective the cache is
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, project_id, code):
+        """Get cached publish for the code
+
+        Args:
+            project_id (int): id of the project
+            code (str): code of the publish
+
+        Returns:
+            dict: published file entity, None if cached as not published,
+            or MISSING if there is no valid entry
+        """
+        key = (project_id, code)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] < time.time():
+                # Expired entries are not useful anymore
+                if entry is not None:
+                    del self._entries[key]
+
+                self.misses += 1
+                return self.MISSING
+
+            # Mark as most recently used
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return entry[1]
+
+    def set(self, project_id, code, published_file):
+        """Store lookup result for the code
+
+        Args:
+            project_id (int): id of the project
+            code (str): code of the publish
+            published_file (dict): published file entity, or None if
+            there is no publish
+        """
+        key = (project_id, code)
+
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, published_file)
+            self._entries.move_to_end(key)
+
+            # Evict least recently used entries
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, project_id, code):
+        """Remove the entry for the code, e.g. after it has been
+        rendered or published
+
+        Args:
+            project_id (int): id of the project
+            code (str): code of the publish
+        """
+        with self._lock:
+            self._entries.pop((project_id, code), None)
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """Get cache statistics
+
+        Returns:
+            dict: containing hits, misses and amount of entries
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }
+
+
+class VersionPattern(object):
+    """
+    Version agnostic code of a publish, the part before and after the
+    version number. Outputs with the version only in the directory have
+    the same code for every version. Codes containing the version more
+    than once also keep the parts between the versions.
+    """
+
+    __slots__ = ("prefix", "suffix", "infixes", "_regex")
+
+    def __init__(self, prefix, suffix=None, infixes=()):
+        """Pattern matching codes of every version
+
+        Args:
+            prefix (str): part of the code before the version number, or
+            the complete code if it doesn't contain the version
+            suffix (str, optional): part of the code after the version
+            number, None if the code doesn't contain the version
+            infixes (tuple, optional): parts of the code between the
+            versions, if the code contains the version more than once,
+            e.g. ("_b_v",) for a_v001_b_v001.exr
+        """
+        self.prefix = prefix
+        self.suffix = suffix
+        self.infixes = tuple(infixes)
+        self._regex = None
+
+    @classmethod
+    def from_codes(cls, code, other_code):
+        """Create pattern from the codes of two different versions
+
+        Args:
+            code (str): code of a version, e.g. comp_v001.%04d.exr
+            other_code (str): code of another version, with a different
+            amount of digits, e.g. comp_v9999.%04d.exr
+
+        Returns:
+            VersionPattern: pattern matching codes of every version, None
+            if the codes differ in more than the versions
+        """
+        if code == other_code:
+            return cls(code)
+
+        length = 0
+        while (
+            length < min(len(code), len(other_code))
+            and code[length] == other_code[length]
+        ):
+            length += 1
+
+        # Suffix can't overlap the prefix
+        suffix_length = 0
+        while (
+            suffix_length < min(len(code), len(other_code)) - length
+            and code[-suffix_length - 1] == other_code[-suffix_length - 1]
+        ):
+            suffix_length += 1
+
+        # Versions can appear more than once, e.g. in a_v001_b_v001.exr
+        # the middle is 001_b_v001, so split it into versions and the
+        # parts between them
+        parts = re.split(r"(\d+)", code[length : len(code) - suffix_length])
+        other_parts = re.split(
+            r"(\d+)", other_code[length : len(other_code) - suffix_length]
+        )
+        if (
+            len(parts) != len(other_parts)
+            or len(parts) < 3
+            or parts[0]
+            or parts[-1]
+            or parts[2:-1:2] != other_parts[2:-1:2]
+        ):
+            return None
+
+        return cls(
+            code[:length], code[len(code) - suffix_length :], parts[2:-1:2]
+        )
+
+    def match(self, code):
+        """Get version of the code if it matches the pattern
+
+        Args:
+            code (str): code of a publish
+
+        Returns:
+            int: version in the code, -1 if the code doesn't contain the
+            version, or None if the code doesn't match
+        """
+        if self.suffix is None:
+            return -1 if code == self.prefix else None
+
+        if self.infixes:
+            return self.__match_versions(code)
+
+        if not (
+            len(code) > len(self.prefix) + len(self.suffix)
+            and code.startswith(self.prefix)
+            and code.endswith(self.suffix)
+        ):
+            return None
+
+        version = code[len(self.prefix) : len(code) - len(self.suffix)]
+        return int(version) if version.isdigit() else None
+
+    def __match_versions(self, code):
+        """Get version of a code containing the version more than once,
+        every occurrence needs to be the same version
+
+        Args:
+            code (str): code of a publish
+
+        Returns:
+            int: version in the code, None if the code doesn't match
+        """
+        if self._regex is None:
+            self._regex = re.compile(
+                r"%s(\d+)%s%s$"
+                % (
+                    re.escape(self.prefix),
+                    "".join(
+                        r"%s(\d+)" % re.escape(infix) for infix in self.infixes
+                    ),
+                    re.escape(self.suffix),
+                )
+            )
+
+        match = self._regex.match(code)
+        if match is None:
+            return None
+
+        versions = set(int(version) for version in match.groups())
+        return versions.pop() if len(versions) == 1 else None
+
+    def get_filter(self):
+        """Create ShotGrid filter matching the codes of every version
+
+        Returns:
+            object: ShotGrid filter
+        """
+        if self.suffix is None:
+            return ["code", "is", self.prefix]
+
+        return {
+            "filter_operator": "all",
+            "filters": [
+                ["code", "starts_with", self.prefix],
+                ["code", "ends_with", self.suffix],
+            ],
+        }
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, VersionPattern)
+            and self.prefix == other.prefix
+            and self.suffix == other.suffix
+            and self.infixes == other.infixes
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.prefix, self.suffix, self.infixes))
+
+    def __repr__(self):
+        return "<%s %s>" % (
+            self.__class__.__name__,
+            self.prefix
+            if self.suffix is None
+            else "#".join((self.prefix,) + self.infixes + (self.suffix,)),
+        )
+
+
+def keep_latest(latest, pattern, published_file):
+    """Keep the published file if it is the latest version of the pattern
+
+    Args:
+        latest (dict): containing pattern with the latest published file
+        pattern (VersionPattern): pattern the published file matches
+        published_file (dict): published file entity, with code and
+        version_number
+    """
+    version = published_file.get("version_number")
+    if version is None:
+        version = pattern.match(published_file.get("code") or "")
+
+    current = latest.get(pattern)
+    if current is None or version > current[0]:
+        latest[pattern] = (version, published_file)
+
+
+class PublishedFileLookup(object):
+    """
+    Looks up PublishedFile entities on ShotGrid by their code
+    """
+
+    # Maximum amount of codes to send in a single "in" filter, keeps
+    # the request size reasonable for very large scripts
+    CHUNK_SIZE = 200
+
+    def __init__(self, sg, chunk_size=None, cache=None):
+        """Lookup using the specified ShotGrid connection
+
+        Args:
+            sg (object): ShotGrid connection, mockgun instance, or function
+            returning the connection to use on the current thread
+            chunk_size (int, optional): amount of codes per query.
+            Defaults to CHUNK_SIZE.
+            cache (PublishedFileCache, optional): cache for the lookups.
+            Defaults to a new cache.
+        """
+        self._sg = sg
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.cache = cache or PublishedFileCache()
+
+        # Amount of ShotGrid queries sent and saved by batching
+        self.round_trips = 0
+        self.round_trips_saved = 0
+
+    @property
+    def sg(self):
+        """object: ShotGrid connection to use on the current thread"""
+        return self._sg() if callable(self._sg) else self._sg
+
+    @staticmethod
+    def get_filters(project_id, code):
+        """Create the filters to search for publishes with the
+        specified code on the project
+
+        Args:
+            project_id (int): id of the project to search in
+            code (str or list): code, or list of codes to search for
+
+        Returns:
+            list: ShotGrid filters
+        """
+        operator = "in" if isinstance(code, (list, tuple)) else "is"
+
+        return [
+            ["project", "is", {"type": "Project", "id": project_id}],
+            ["code", operator, code],
+        ]
+
+    def find_one(self, project_id, code):
+        """Search for a single publish with the specified code
+
+        Args:
+            project_id (int): id of the project to search in
+            code (str): code of the publish, e.g. the file name
+
+        Returns:
+            dict: published file entity, None if there is no publish
+        """
+        published_file = self.cache.get(project_id, code)
+        if published_file is not self.cache.MISSING:
+            return published_file
+
+        self.round_trips += 1
+        with timer.span("shotgun.find_one"):
+            published_file = self.sg.find_one(
+                "PublishedFile", self.get_filters(project_id, code)
+            )
+        self.cache.set(project_id, code, published_file)
+
+        return published_file
+
+    def find_many(self, project_id, codes):
+        """Search for all publishes with the specified codes, using
+        one query per chunk instead of one query per code
+
+        Args:
+            project_id (int): id of the project to search in
+            codes (list): codes of the publishes to search for
+
+        Returns:
+            dict: containing code with published file entity, codes
+            without a publish are not included
+        """
+
+        published_files = {}
+
+        # Remove duplicates but keep order, so the chunks are stable,
+        # and only query the codes not answered by the cache
+        unique_codes = []
+        for code in dict.fromkeys(codes):
+            published_file = self.cache.get(project_id, code)
+
+            if published_file is self.cache.MISSING:
+                unique_codes.append(code)
+            elif published_file is not None:
+                published_files[code] = published_file
+
+        queries = 0
+        for index in range(0, len(unique_codes), self.chunk_size):
+            chunk = unique_codes[index : index + self.chunk_size]
+
+            with timer.span("shotgun.find"):
+                results = self.sg.find(
+                    "PublishedFile",
+                    self.get_filters(project_id, chunk),
+                    ["code"],
+                )
+            queries += 1
+
+            # Keep first publish per code, as find_one would do
+            found = {}
+            for published_file in results:
+                found.setdefault(published_file.get("code"), published_file)
+
+            # Cache both found and not published codes
+            for code in chunk:
+                self.cache.set(project_id, code, found.get(code))
+
+            published_files.update(found)
+
+        saved = max(len(codes) - queries, 0)
+        self.round_trips += queries
+        self.round_trips_saved += saved
+
+        logger.debug(
+            "Resolved %s publish codes in %s queries, saved %s round-trips"
+            % (len(codes), queries, saved)
+        )
+
+        return published_files
+
+    def refresh(self, project_id):
+        """Forget all cached lookups, so every lookup goes to
+        ShotGrid again
+
+        Args:
+            project_id (int): id of the project
+        """
+        self.cache.clear()
+
+    def get_stats(self):
+        """Get statistics of the lookup
+
+        Returns:
+            dict: containing cache hits, misses and amount of entries,
+            and the amount of ShotGrid queries sent and saved
+        """
+        return dict(
+            self.cache.get_stats(),
+            round_trips=self.round_trips,
+            round_trips_saved=self.round_trips_saved,
+        )
+
+    def find_latest(self, project_id, patterns):
+        """Search for the latest version of every pattern, using one
+        query per chunk of patterns. Not cached, as new versions can be
+        published at any time.
+
+        Args:
+            project_id (int): id of the project to search in
+            patterns (list): version agnostic codes to search for
+
+        Returns:
+            dict: containing pattern with published file entity of the
+            highest version, patterns without a publish are not included
+        """
+        patterns = list(dict.fromkeys(patterns))
+        latest = {}
+
+        for index in range(0, len(patterns), self.chunk_size):
+            chunk = patterns[index : index + self.chunk_size]
+
+            with timer.span("shotgun.find"):
+                results = self.sg.find(
+                    "PublishedFile",
+                    [
+                        [
+                            "project",
+                            "is",
+                            {"type": "Project", "id": project_id},
+                        ],
+                        {
+                            "filter_operator": "any",
+                            "filters": [
+                                pattern.get_filter() for pattern in chunk
+                            ],
+                        },
+                    ],
+                    ["code", "version_number", "path"],
+                )
+            self.round_trips += 1
+
+            for published_file in results:
+                code = published_file.get("code") or ""
+                for pattern in chunk:
+                    if pattern.match(code) is not None:
+                        keep_latest(latest, pattern, published_file)
+
+        logger.debug(
+            "Resolved latest versions of %s outputs in %s queries"
+            % (len(patterns), -(-len(patterns) // self.chunk_size))
+        )
+
+        return dict(
+            (pattern, published_file)
+            for pattern, (version, published_file) in latest.items()
+        )
+
+    def invalidate(self, project_id, code):
+        """Forget the cached lookup for the code, so the next lookup
+        goes to ShotGrid again
+
+        Args:
+            project_id (int): id of the project
+            code (str): code of the publish
+        """
+        self.cache.invalidate(project_id, code)
@@ -0,0 +1,635 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+import datetime
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from .publish import keep_latest
+from .timing import timed, timer
+
+# standard toolkit logger
+logger = sgtk.platform.get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS published_files (
+    id INTEGER PRIMARY KEY,
+    project_id INTEGER NOT NULL,
+    code TEXT,
+    path TEXT,
+    version INTEGER,
+    updated_at TEXT,
+    generation INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS published_files_code
+    ON published_files (project_id, code);
+CREATE TABLE IF NOT EXISTS sync_state (
+    project_id INTEGER PRIMARY KEY,
+    high_water TEXT,
+    synced_at REAL,
+    generation INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class PublishedFileIndex(object):
+    """
+    Local SQLite index of the PublishedFile entities of a project, so
+    publish lookups don't need a ShotGrid query. The index is updated
+    incrementally, only fetching publishes updated since the last sync,
+    and is shared by all Nuke sessions on the workstation. When syncing
+    in the background, lookups are answered from the index right away
+    and only wait for ShotGrid the first time a project is used.
+
+    Can be used instead of PublishedFileLookup, and tested with mockgun.
+    """
+
+    FIELDS = ["code", "path", "version_number", "updated_at"]
+
+    # Amount of publishes fetched per query while syncing
+    PAGE_SIZE = 500
+
+    # Maximum amount of codes in a single local query
+    CHUNK_SIZE = 500
+
+    def __init__(
+        self, sg, path, sync_interval=30.0, fallback=None, background=False
+    ):
+        """Index stored in the specified database file
+
+        Args:
+            sg (object): ShotGrid connection, mockgun instance, or function
+            returning the connection to use on the current thread
+            path (str): path of the SQLite database
+            sync_interval (float, optional): seconds the index is used
+            before checking ShotGrid for updates. Defaults to 30 seconds.
+            fallback (PublishedFileLookup, optional): used when the
+            database can't be used, e.g. when the disk is full
+            background (bool, optional): sync projects synced before on
+            a worker thread, instead of before answering the lookup.
+            Defaults to False.
+        """
+        self._sg = sg
+        self.path = path
+        self.sync_interval = sync_interval
+        self.fallback = fallback
+        self.background = background
+
+        # Projects to check for updates on the next lookup
+        self._stale = set()
+        self._lock = threading.Lock()
+        self._schema_created = False
+
+        # Projects being synced in the background
+        self._syncing = set()
+        self._executor = None
+
+        # Counters to see how effective the index is
+        self.hits = 0
+        self.misses = 0
+        self.syncs = 0
+        self.synced_entities = 0
+        self.retired_entities = 0
+
+    @property
+    def sg(self):
+        """object: ShotGrid connection to use on the current thread"""
+        return self._sg() if callable(self._sg) else self._sg
+
+    def find_one(self, project_id, code):
+        """Search for a single publish with the specified code
+
+        Args:
+            project_id (int): id of the project to search in
+            code (str): code of the publish, e.g. the file name
+
+        Returns:
+            dict: published file entity, None if there is no publish
+        """
+        return self.find_many(project_id, [code]).get(code)
+
+    def find_many(self, project_id, codes):
+        """Search for all publishes with the specified codes
+
+        Args:
+            project_id (int): id of the project to search in
+            codes (list): codes of the publishes to search for
+
+        Returns:
+            dict: containing code with published file entity, codes
+            without a publish are not included
+        """
+        codes = list(dict.fromkeys(codes))
+
+        try:
+            self.__update(project_id)
+
+            published_files = {}
+            with timer.span("index.find"), self.__connect() as connection:
+                for index in range(0, len(codes), self.CHUNK_SIZE):
+                    chunk = codes[index : index + self.CHUNK_SIZE]
+                    published_files.update(
+                        self.__select(connection, project_id, chunk)
+                    )
+
+        except (sqlite3.Error, OSError) as e:
+            if self.fallback is None:
+                raise
+
+            logger.debug(
+                "Could not use publish index %s, because %s"
+                % (self.path, str(e))
+            )
+            return self.fallback.find_many(project_id, codes)
+
+        with self._lock:
+            self.hits += len(published_files)
+            self.misses += len(codes) - len(published_files)
+
+        return published_files
+
+    def find_latest(self, project_id, patterns):
+        """Search for the latest version of every pattern
+
+        Args:
+            project_id (int): id of the project to search in
+            patterns (list): version agnostic codes to search for
+
+        Returns:
+            dict: containing pattern with published file entity of the
+            highest version, patterns without a publish are not included
+        """
+        patterns = list(dict.fromkeys(patterns))
+
+        try:
+            self.__update(project_id)
+
+            latest = {}
+            with timer.span("index.find"), self.__connect() as connection:
+                for pattern in patterns:
+                    # Codes starting with the prefix are next to each
+                    # other in the index
+                    rows = connection.execute(
+                        "SELECT id, code, path, version FROM published_files "
+                        "WHERE project_id = ? AND code >= ? AND code < ?",
+                        (
+                            project_id,
+                            pattern.prefix,
+                            pattern.prefix + "\U0010ffff",
+                        ),
+                    )
+                    for row in rows:
+                        if pattern.match(row[1]) is not None:
+                            keep_latest(
+                                latest, pattern, self.__to_entity(*row)
+                            )
+
+        except (sqlite3.Error, OSError) as e:
+            if self.fallback is None:
+                raise
+
+            logger.debug(
+                "Could not use publish index %s, because %s"
+                % (self.path, str(e))
+            )
+            return self.fallback.find_latest(project_id, patterns)
+
+        return dict(
+            (pattern, published_file)
+            for pattern, (version, published_file) in latest.items()
+        )
+
+    def invalidate(self, project_id, code=None):
+        """Check ShotGrid for updates on the next lookup, e.g. after
+        rendering or publishing
+
+        Args:
+            project_id (int): id of the project
+            code (str, optional): code of the publish that changed
+        """
+        with self._lock:
+            self._stale.add(project_id)
+
+        if self.fallback is not None and code is not None:
+            self.fallback.invalidate(project_id, code)
+
+    def refresh(self, project_id):
+        """Rebuild the index of the project from scratch, also removing
+        publishes that have been deleted on ShotGrid
+
+        Args:
+            project_id (int): id of the project
+
+        Returns:
+            int: amount of publishes fetched
+        """
+        if self.fallback is not None:
+            self.fallback.refresh(project_id)
+
+        return self.sync(project_id, force=True)
+
+    @timed("index.sync")
+    def sync(self, project_id, force=False):
+        """Fetch publishes updated since the last sync, if the last sync
+        of any session is longer ago than the sync interval. Publishes
+        retired in ShotGrid since then are removed from the index.
+
+        Args:
+            project_id (int): id of the project
+            force (bool, optional): fetch all publishes of the project,
+            and remove the ones not existing anymore. Defaults to False.
+
+        Returns:
+            int: amount of publishes fetched
+        """
+        with self._lock:
+            stale = project_id in self._stale
+            self._stale.discard(project_id)
+
+        row = self.__get_sync_state(project_id)
+        high_water, synced_at, generation = row or (None, None, 0)
+
+        # Another session could have synced just now
+        if not force and not stale and self.__is_recent(synced_at):
+            return 0
+
+        filters = [["project", "is", {"type": "Project", "id": project_id}]]
+        if force:
+            generation += 1
+        elif high_water:
+            # Publishes updated within the same second as the last one
+            # fetched could have been missed, so overlap a bit
+            since = datetime.datetime.fromisoformat(high_water)
+            filters.append(
+                [
+                    "updated_at",
+                    "greater_than",
+                    since - datetime.timedelta(seconds=1),
+                ]
+            )
+
+        synced_at = time.time()
+        try:
+            # Retired publishes aren't returned by an incremental fetch,
+            # so look them up over the same window
+            retired = []
+            if not force and high_water:
+                retired = self.__fetch_retired(filters)
+                with self.__connect() as connection:
+                    connection.executemany(
+                        "DELETE FROM published_files WHERE id = ?",
+                        [(entity_id,) for entity_id in retired],
+                    )
+
+            fetched, high_water = self.__fetch(
+                project_id, filters, generation, high_water
+            )
+
+        # Database errors are handled by the caller
+        except sqlite3.Error:
+            raise
+
+        # Keep using the index while ShotGrid is unavailable
+        except Exception as e:
+            logger.warning(
+                "Could not update publish index, because %s" % str(e)
+            )
+            return 0
+
+        with self.__connect() as connection:
+            if force:
+                connection.execute(
+                    "DELETE FROM published_files "
+                    "WHERE project_id = ? AND generation != ?",
+                    (project_id, generation),
+                )
+            connection.execute(
+                "INSERT OR REPLACE INTO sync_state "
+                "(project_id, high_water, synced_at, generation) "
+                "VALUES (?, ?, ?, ?)",
+                (project_id, high_water, synced_at, generation),
+            )
+
+        with self._lock:
+            self.syncs += 1
+            self.synced_entities += fetched
+            self.retired_entities += len(retired)
+
+        logger.debug(
+            "Synced %s publishes of project %s into %s, removing %s "
+            "retired ones" % (fetched, project_id, self.path, len(retired))
+        )
+
+        return fetched
+
+    def get_stats(self):
+        """Get statistics of the index
+
+        Returns:
+            dict: containing hits, misses, amount of syncs, publishes
+            fetched and retired publishes removed, and amount of entries
+        """
+        try:
+            with self.__connect() as connection:
+                entries = connection.execute(
+                    "SELECT COUNT(*) FROM published_files"
+                ).fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "syncs": self.syncs,
+                "synced_entities": self.synced_entities,
+                "retired_entities": self.retired_entities,
+                "entries": entries,
+            }
+
+    def wait(self):
+        """Wait for the syncs running in the background to finish"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __update(self, project_id):
+        """Make sure the index of the project is up to date enough to
+        answer a lookup. Only a project that has never been synced is
+        synced before answering when syncing in the background.
+
+        Args:
+            project_id (int): id of the project
+        """
+        if not self.background:
+            self.sync(project_id)
+            return
+
+        row = self.__get_sync_state(project_id)
+        if row is None:
+            self.sync(project_id)
+            return
+
+        with self._lock:
+            if project_id in self._syncing:
+                return
+
+            if project_id not in self._stale and self.__is_recent(row[1]):
+                return
+
+            self._syncing.add(project_id)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+
+        self._executor.submit(self.__sync_in_background, project_id)
+
+    def __sync_in_background(self, project_id):
+        """Sync the project, only logging failures as nobody is waiting
+        for the result
+
+        Args:
+            project_id (int): id of the project
+        """
+        try:
+            self.sync(project_id)
+        except Exception as e:
+            logger.debug(
+                "Could not sync publish index in background, because %s"
+                % str(e)
+            )
+        finally:
+            with self._lock:
+                self._syncing.discard(project_id)
+
+    def __get_sync_state(self, project_id):
+        """Get state of the last sync of the project
+
+        Args:
+            project_id (int): id of the project
+
+        Returns:
+            tuple: high water mark, time of the sync and generation, None
+            if the project has never been synced
+        """
+        with self.__connect() as connection:
+            return connection.execute(
+                "SELECT high_water, synced_at, generation FROM sync_state "
+                "WHERE project_id = ?",
+                (project_id,),
+            ).fetchone()
+
+    def __is_recent(self, synced_at):
+        """Check if a sync is recent enough to skip syncing again
+
+        Args:
+            synced_at (float): time of the sync, None if never synced
+
+        Returns:
+            bool: True if synced within the sync interval
+        """
+        return (
+            synced_at is not None
+            and time.time() - synced_at < self.sync_interval
+        )
+
+    def __fetch(self, project_id, filters, generation, high_water):
+        """Fetch publishes page by page, storing every page right away
+        so memory doesn't grow with the size of the project
+
+        Args:
+            project_id (int): id of the project
+            filters (list): ShotGrid filters for the publishes
+            generation (int): generation to store the publishes as
+            high_water (str): latest update time stored before
+
+        Returns:
+            tuple: amount of publishes fetched and latest update time
+        """
+        fetched = 0
+        last_id = 0
+
+        while True:
+            # Paging on id instead of page numbers, so publishes created
+            # while syncing don't shift the pages
+            with timer.span("shotgun.find"):
+                results = self.sg.find(
+                    "PublishedFile",
+                    filters + [["id", "greater_than", last_id]],
+                    self.FIELDS,
+                    order=[{"field_name": "id", "direction": "asc"}],
+                    limit=self.PAGE_SIZE,
+                )
+
+            if not results:
+                break
+
+            results.sort(key=lambda published_file: published_file["id"])
+            rows = []
+            for published_file in results:
+                updated_at = published_file.get("updated_at")
+                if updated_at is not None:
+                    updated_at = updated_at.isoformat()
+                    high_water = max(high_water or updated_at, updated_at)
+
+                rows.append(
+                    (
+                        published_file["id"],
+                        project_id,
+                        published_file.get("code"),
+                        self.__get_local_path(published_file.get("path")),
+                        published_file.get("version_number"),
+                        updated_at,
+                        generation,
+                    )
+                )
+
+            with self.__connect() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO published_files "
+                    "(id, project_id, code, path, version, updated_at, "
+                    "generation) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+
+            fetched += len(results)
+            last_id = results[-1]["id"]
+
+            if len(results) < self.PAGE_SIZE:
+                break
+
+        return fetched, high_water
+
+    def __fetch_retired(self, filters):
+        """Fetch the ids of publishes retired in ShotGrid, page by page
+
+        Args:
+            filters (list): ShotGrid filters for the publishes
+
+        Returns:
+            list: ids of the retired publishes
+        """
+        retired = []
+        last_id = 0
+
+        while True:
+            with timer.span("shotgun.find"):
+                results = self.sg.find(
+                    "PublishedFile",
+                    filters + [["id", "greater_than", last_id]],
+                    ["id"],
+                    order=[{"field_name": "id", "direction": "asc"}],
+                    limit=self.PAGE_SIZE,
+                    retired_only=True,
+                )
+
+            if not results:
+                break
+
+            ids = sorted(published_file["id"] for published_file in results)
+            retired.extend(ids)
+            last_id = ids[-1]
+
+            if len(results) < self.PAGE_SIZE:
+                break
+
+        return retired
+
+    @staticmethod
+    def __select(connection, project_id, codes):
+        """Select first publish of every code
+
+        Args:
+            connection (Connection): database connection
+            project_id (int): id of the project
+            codes (list): codes to select
+
+        Returns:
+            dict: containing code with published file entity
+        """
+        rows = connection.execute(
+            "SELECT id, code, path, version FROM published_files "
+            "WHERE project_id = ? AND code IN (%s) ORDER BY id"
+            % ",".join("?" * len(codes)),
+            [project_id] + codes,
+        )
+
+        # Keep first publish per code, as ShotGrid would return
+        published_files = {}
+        for row in rows:
+            published_files.setdefault(
+                row[1], PublishedFileIndex.__to_entity(*row)
+            )
+
+        return published_files
+
+    @staticmethod
+    def __to_entity(entity_id, code, path, version):
+        """Convert row of the index to a published file entity
+
+        Args:
+            entity_id (int): id of the publish
+            code (str): code of the publish
+            path (str): local path of the publish
+            version (int): version number of the publish
+
+        Returns:
+            dict: published file entity, as ShotGrid would return
+        """
+        return {
+            "type": "PublishedFile",
+            "id": entity_id,
+            "code": code,
+            "path": {"local_path": path},
+            "version_number": version,
+        }
+
+    @staticmethod
+    def __get_local_path(path):
+        """Get local path of the path field of a publish
+
+        Args:
+            path (dict): path field, None if not set
+
+        Returns:
+            str: local path, None if not available
+        """
+        if isinstance(path, dict):
+            return path.get("local_path")
+
+        return path
+
+    @contextmanager
+    def __connect(self):
+        """Connect to the database, creating it when needed. Connections
+        are opened per operation, as they can't be shared by threads.
+
+        Yields:
+            Connection: database connection, committed and closed when
+            the block succeeded
+        """
+        if not self._schema_created:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+
+        connection = sqlite3.connect(self.path, timeout=30.0)
+        with closing(connection):
+            if not self._schema_created:
+                # Sessions keep reading while another session writes
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(SCHEMA)
+                self._schema_created = True
+
+            with connection:
+                yield connection
@@ -0,0 +1,153 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+
+# standard toolkit logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+class WriteNodeConfiguration(object):
+    """
+    Compiled configuration for a single write node data type
+    """
+
+    __slots__ = (
+        "category",
+        "name",
+        "file_type",
+        "settings",
+        "tile_color",
+        "render_template_name",
+        "publish_template_name",
+        "render_template",
+        "publish_template",
+    )
+
+    def __init__(
+        self, category, write_node, render_template, publish_template
+    ):
+        """Record containing everything needed to set up a write node
+
+        Args:
+            category (str): name of the category this data type belongs to
+            write_node (dict): write node entry from the app configuration
+            render_template (object): resolved render template
+            publish_template (object): resolved publish template
+        """
+        self.category = category
+        self.name = write_node.get("name")
+        self.file_type = write_node.get("file_type")
+        self.settings = write_node.get("settings") or {}
+        self.tile_color = write_node.get("tile_color")
+        self.render_template_name = write_node.get("render_template")
+        self.publish_template_name = write_node.get("publish_template")
+        self.render_template = render_template
+        self.publish_template = publish_template
+
+    def __repr__(self):
+        return "<%s %s/%s>" % (
+            self.__class__.__name__,
+            self.category,
+            self.name,
+        )
+
+
+class WriteNodeRegistry(object):
+    """
+    Index of all configured write nodes, keyed by category and data type
+    """
+
+    def __init__(self, app):
+        """Registry is compiled once from the app settings, and needs
+        to be rebuilt whenever the settings are reloaded
+
+        Args:
+            app (object): application to read the settings from
+        """
+        self.app = app
+        self._configurations = {}
+        self._options = {}
+
+        self.rebuild()
+
+    def rebuild(self):
+        """Compile all categories from the app settings into the index"""
+
+        configurations = {}
+        options = {}
+
+        # Templates are shared between a lot of data types, so only
+        # resolve every template name once
+        templates = {}
+
+        for category in self.app.get_setting("categories") or []:
+            category_name = category.get("category_name")
+
+            write_node_names = []
+            for write_node in category.get("write_nodes") or []:
+                for template_name in (
+                    write_node.get("render_template"),
+                    write_node.get("publish_template"),
+                ):
+                    if template_name not in templates:
+                        templates[
+                            template_name
+                        ] = self.app.get_template_by_name(template_name)
+
+                configuration = WriteNodeConfiguration(
+                    category_name,
+                    write_node,
+                    templates.get(write_node.get("render_template")),
+                    templates.get(write_node.get("publish_template")),
+                )
+
+                # Keep first match, as the linear search used to do
+                key = (category_name, configuration.name)
+                if key not in configurations:
+                    configurations[key] = configuration
+                    write_node_names.append(configuration.name)
+
+            options[category_name] = write_node_names
+
+        self._configurations = configurations
+        self._options = options
+
+        logger.debug(
+            "Compiled %s write node configurations in %s categories"
+            % (len(configurations), len(options))
+        )
+
+    def get(self, category, data_type):
+        """Get configuration for the category and data type
+
+        Args:
+            category (str): category name
+            data_type (str): data type name
+
+        Returns:
+            WriteNodeConfiguration: matching configuration, None if
+            nothing has been configured
+        """
+        return self._configurations.get((category, data_type))
+
+    def get_options(self):
+        """Get all category names with their data type names
+
+        Returns:
+            dict: category name and write node names
+        """
+        return dict(
+            (category, list(names))
+            for category, names in self._options.items()
+        )
+
+    def __len__(self):
+        return len(self._configurations)
@@ -0,0 +1,232 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+import nuke
+
+# standard toolkit logger
+logger = sgtk.platform.get_logger(__name__)
+
+# Node classes the ShotGrid write node can show up as, either as
+# the gizmo itself or when it has been converted to a group
+NODE_CLASSES = ("Group", "sgWrite")
+
+
+class SceneRegistry(object):
+    """
+    Index of the ShotGrid write nodes in the current script, kept up to
+    date by node callbacks instead of scanning all groups every time
+    """
+
+    def __init__(self):
+        # Node name to output name, and output name to the names of the
+        # nodes using it, as copied nodes share their output
+        self._outputs = {}
+        self._nodes = {}
+
+        # Without callbacks, e.g. in batch sessions, the index can't be
+        # trusted so the script is scanned on every query
+        self._tracking = False
+
+    @staticmethod
+    def is_write_node(node):
+        """Check if node is a ShotGrid write node in the root of the script
+
+        Args:
+            node (attribute): node to check
+
+        Returns:
+            bool: True if it is a ShotGrid write node
+        """
+        # In the write nodes, we have a special knob to help identify
+        # this group as a write node
+        if node.knob("isShotGridWriteNode") is None:
+            return False
+
+        # Only nodes on root level, as allNodes would return them
+        return "." not in node.fullName()
+
+    def rebuild(self):
+        """Rebuild the index by scanning the whole script"""
+
+        self._outputs.clear()
+        self._nodes.clear()
+
+        with nuke.root():
+            for node_class in NODE_CLASSES:
+                for node in nuke.allNodes(node_class):
+                    if self.is_write_node(node):
+                        self.__add(node)
+
+        logger.debug(
+            "Indexed %s ShotGrid write nodes in script" % len(self._outputs)
+        )
+
+    def clear(self):
+        """Remove all nodes from the index"""
+        self._outputs.clear()
+        self._nodes.clear()
+
+    def get_node_names(self):
+        """Get names of all ShotGrid write nodes
+
+        Returns:
+            list: write node names in current script
+        """
+        self.__rebuild_if_untracked()
+        node_names = list(self._outputs.keys())
+
+        # Index is out of date if a node is gone, so start over
+        for node_name in node_names:
+            if nuke.toNode(node_name) is None:
+                logger.debug("Write node %s went missing" % node_name)
+                self.rebuild()
+                return list(self._outputs.keys())
+
+        return node_names
+
+    def get_outputs(self):
+        """Get output names of all ShotGrid write nodes
+
+        Returns:
+            set: output names in current script
+        """
+        self.__rebuild_if_untracked()
+        return set(self._nodes.keys())
+
+    def has_output(self, output_name):
+        """Check if there is a write node using the output name
+
+        Args:
+            output_name (str): output name to check
+
+        Returns:
+            bool: True if the output is used by a write node
+        """
+        return self.get_node_by_output(output_name) is not None
+
+    def get_node_by_output(self, output_name):
+        """Get write node using the output name
+
+        Args:
+            output_name (str): output name to search for
+
+        Returns:
+            attribute: write node, None if no node uses the output
+        """
+        self.__rebuild_if_untracked()
+        node_names = self._nodes.get(output_name)
+        if not node_names:
+            return None
+
+        node_name = min(node_names)
+        node = nuke.toNode(node_name)
+
+        # Index is out of date if node is gone, so start over
+        if node is None or not self.is_write_node(node):
+            logger.debug("Write node %s went missing" % node_name)
+            self.rebuild()
+
+            node_names = self._nodes.get(output_name)
+            node = nuke.toNode(min(node_names)) if node_names else None
+
+        return node
+
+    def update(self, node):
+        """Add or update the node in the index, e.g. after its
+        output has been set
+
+        Args:
+            node (attribute): write node to update
+        """
+        if self.is_write_node(node):
+            self.__add(node)
+
+    def rename(self, node):
+        """Update the index after the node has been renamed. Called from
+        the knobChanged of the write node itself, as a knobChanged
+        callback on all groups would run on every knob change of them.
+
+        Args:
+            node (attribute): renamed write node
+        """
+        if not self._tracking or not self.is_write_node(node):
+            return
+
+        # Node name already changed, so remove the old name
+        for node_name in list(self._outputs.keys()):
+            if node_name == node.name() or nuke.toNode(node_name) is None:
+                self.__remove(node_name)
+
+        self.__add(node)
+
+    def add_callbacks(self):
+        """Keep index up to date with node callbacks"""
+        for node_class in NODE_CLASSES:
+            nuke.addOnCreate(self.__on_create, nodeClass=node_class)
+            nuke.addOnDestroy(self.__on_destroy, nodeClass=node_class)
+
+        nuke.addOnScriptLoad(self.rebuild, nodeClass="Root")
+        nuke.addOnScriptClose(self.clear, nodeClass="Root")
+        self._tracking = True
+
+    def remove_callbacks(self):
+        """Removes callbacks on destroy"""
+        for node_class in NODE_CLASSES:
+            nuke.removeOnCreate(self.__on_create, nodeClass=node_class)
+            nuke.removeOnDestroy(self.__on_destroy, nodeClass=node_class)
+
+        nuke.removeOnScriptLoad(self.rebuild, nodeClass="Root")
+        nuke.removeOnScriptClose(self.clear, nodeClass="Root")
+        self._tracking = False
+
+    def __rebuild_if_untracked(self):
+        """Scan the script if the index isn't kept up to date"""
+        if not self._tracking:
+            self.rebuild()
+
+    def __add(self, node):
+        """Add node to the index
+
+        Args:
+            node (attribute): write node to add
+        """
+        node_name = node.name()
+        output_name = node["output"].value()
+
+        self.__remove(node_name)
+        self._outputs[node_name] = output_name
+        self._nodes.setdefault(output_name, set()).add(node_name)
+
+    def __remove(self, node_name):
+        """Remove node from the index
+
+        Args:
+            node_name (str): name of the node to remove
+        """
+        output_name = self._outputs.pop(node_name, None)
+        node_names = self._nodes.get(output_name)
+        if node_names is None:
+            return
+
+        # Other nodes could still use the output
+        node_names.discard(node_name)
+        if not node_names:
+            del self._nodes[output_name]
+
+    def __on_create(self):
+        """Called when a node has been created"""
+        node = nuke.thisNode()
+        if self.is_write_node(node):
+            self.__add(node)
+
+    def __on_destroy(self):
+        """Called when a node is about to be deleted"""
+        self.__remove(nuke.thisNode().name())
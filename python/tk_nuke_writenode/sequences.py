@@ -0,0 +1,374 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+import os
+import posixpath
+import re
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from .directories import directory_listings
+from .timing import timed
+
+# standard toolkit logger
+logger = sgtk.platform.get_logger(__name__)
+
+# Matches the frame part of a sequence path, e.g. %04d, %d or ####
+FRAME_SPEC_REGEX = re.compile(r"%(\d*)d|(#+)")
+
+
+class SequencePattern(object):
+    """
+    File name pattern of a frame sequence, derived from a render path
+    """
+
+    __slots__ = ("directory", "prefix", "padding", "extension")
+
+    def __init__(self, directory, prefix, padding, extension):
+        """Pattern for the frame sequence
+
+        Args:
+            directory (str): directory containing the frames
+            prefix (str): file name part before the frame number
+            padding (int): minimum amount of digits for frame numbers
+            extension (str): file name part after the frame number
+        """
+        self.directory = directory
+        self.prefix = prefix
+        self.padding = padding
+        self.extension = extension
+
+    @classmethod
+    def from_path(cls, path):
+        """Create pattern from a sequence path
+
+        Args:
+            path (str): sequence path, e.g. /renders/comp.%04d.exr
+
+        Returns:
+            SequencePattern: pattern for the path, None if the path
+            doesn't contain a frame specification
+        """
+        directory, file_name = os.path.split(path)
+
+        # Use the last frame spec, directories could contain numbers
+        frame_specs = list(FRAME_SPEC_REGEX.finditer(file_name))
+        if not frame_specs:
+            return None
+
+        frame_spec = frame_specs[-1]
+        if frame_spec.group(2):
+            padding = len(frame_spec.group(2))
+        else:
+            padding = int(frame_spec.group(1) or 0)
+
+        return cls(
+            directory,
+            file_name[: frame_spec.start()],
+            padding,
+            file_name[frame_spec.end() :],
+        )
+
+    def match(self, file_name):
+        """Get frame number from the file name
+
+        Args:
+            file_name (str): file name to match
+
+        Returns:
+            int: frame number, None if the file is not part of the sequence
+        """
+        if not (
+            file_name.startswith(self.prefix)
+            and file_name.endswith(self.extension)
+        ):
+            return None
+
+        frame = file_name[
+            len(self.prefix) : len(file_name) - len(self.extension)
+        ]
+        if not frame.isdigit():
+            return None
+
+        # Frame numbers need to be padded exactly, only frames
+        # exceeding the padding are allowed to be longer
+        if len(frame) < self.padding:
+            return None
+
+        if len(frame) > max(self.padding, 1) and frame.startswith("0"):
+            return None
+
+        return int(frame)
+
+    def get_path(self, frame):
+        """Get path of a single frame of the sequence
+
+        Args:
+            frame (int): frame number
+
+        Returns:
+            str: path of the frame
+        """
+        file_name = "%s%0*d%s" % (
+            self.prefix,
+            self.padding,
+            frame,
+            self.extension,
+        )
+
+        return os.path.join(self.directory, file_name)
+
+
+class FrameRange(object):
+    """
+    Set of frame numbers stored as runs of consecutive frames, so even
+    very long sequences only take up memory per gap
+    """
+
+    __slots__ = ("_starts", "_ends", "count")
+
+    def __init__(self, starts=None, ends=None):
+        """Frame range using the specified runs
+
+        Args:
+            starts (array, optional): first frame of every run, sorted
+            ends (array, optional): last frame of every run
+        """
+        self._starts = starts if starts is not None else array("q")
+        self._ends = ends if ends is not None else array("q")
+        self.count = sum(
+            end - start + 1 for start, end in zip(self._starts, self._ends)
+        )
+
+    @classmethod
+    def from_frames(cls, frames):
+        """Create frame range from frame numbers
+
+        Args:
+            frames (iterable): frame numbers, duplicates are ignored
+
+        Returns:
+            FrameRange: frame range containing the frames
+        """
+        frames = array("q", frames)
+
+        # Scanned frames are sorted already, so only sort if needed
+        if any(frames[i] > frames[i + 1] for i in range(len(frames) - 1)):
+            frames = array("q", sorted(frames))
+
+        starts = array("q")
+        ends = array("q")
+        for frame in frames:
+            if ends and frame <= ends[-1] + 1:
+                ends[-1] = max(ends[-1], frame)
+            else:
+                starts.append(frame)
+                ends.append(frame)
+
+        return cls(starts, ends)
+
+    @property
+    def first(self):
+        """int: first frame, None if there are no frames"""
+        return self._starts[0] if self._starts else None
+
+    @property
+    def last(self):
+        """int: last frame, None if there are no frames"""
+        return self._ends[-1] if self._ends else None
+
+    @property
+    def runs(self):
+        """list: first and last frame of every run of consecutive frames"""
+        return list(zip(self._starts, self._ends))
+
+    def get_missing(self):
+        """Get frames missing between the first and last frame
+
+        Returns:
+            list: first and last frame of every gap
+        """
+        return [
+            (self._ends[index] + 1, self._starts[index + 1] - 1)
+            for index in range(len(self._starts) - 1)
+        ]
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return bool(self._starts)
+
+    __nonzero__ = __bool__
+
+    def __contains__(self, frame):
+        index = bisect_right(self._starts, frame) - 1
+        return index >= 0 and frame <= self._ends[index]
+
+    def __iter__(self):
+        for start, end in zip(self._starts, self._ends):
+            for frame in range(start, end + 1):
+                yield frame
+
+    def __str__(self):
+        return format_runs(self.runs)
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, self)
+
+
+def format_runs(runs):
+    """Format runs of frames as a frame list, e.g. 1001-1010,1012
+
+    Args:
+        runs (list): first and last frame of every run
+
+    Returns:
+        str: frame list
+    """
+    return ",".join(
+        str(start) if start == end else "%s-%s" % (start, end)
+        for start, end in runs
+    )
+
+
+def expand_views(path, views):
+    """Get path of every view, for paths containing the view of a
+    stereo or multi-view render, e.g. /renders/comp_%V.%04d.exr
+
+    Args:
+        path (str): sequence path, with %V for the view name, or %v for
+        the first letter of the view name
+        views (list): names of the views, e.g. ["left", "right"]
+
+    Returns:
+        list: path of every view, only the path itself if it doesn't
+        depend on the view
+    """
+    if "%V" not in path and "%v" not in path:
+        return [path]
+
+    return [path.replace("%V", view).replace("%v", view[:1]) for view in views]
+
+
+def normalize_path(path):
+    """Normalize a sequence path into a key that can be compared,
+    e.g. C:\\Renders\\comp.####.exr and c:/renders/comp.%04d.exr
+
+    Args:
+        path (str): sequence path
+
+    Returns:
+        str: normalized path
+    """
+
+    def frame_spec(match):
+        if match.group(2):
+            padding = len(match.group(2))
+        else:
+            padding = int(match.group(1) or 0)
+
+        return "%%0%dd" % padding if padding > 1 else "%d"
+
+    path = FRAME_SPEC_REGEX.sub(frame_spec, path.replace("\\", "/"))
+
+    return posixpath.normpath(path).lower()
+
+
+@timed("filesystem.scan_frames")
+def scan_frames(path, progress=None):
+    """Scan the directory of the sequence for existing frames. Only files
+    matching the sequence are looked at, and as the directory entries
+    already know their type, no extra stat is done per file.
+
+    Args:
+        path (str): sequence path, e.g. /renders/comp.%04d.exr
+        progress (Progress, optional): progress of the task running the
+        scan, used to report and stop when cancelled
+
+    Returns:
+        list: sorted frame numbers found on disk
+    """
+    pattern = SequencePattern.from_path(path)
+    if pattern is None:
+        return []
+
+    return _scan_directory(pattern.directory, [pattern], progress)[0]
+
+
+@timed("filesystem.scan_sequences")
+def scan_sequences(paths, max_workers=8, progress=None):
+    """Scan for existing frames of multiple sequences, listing every
+    directory only once. Directories are scanned in parallel.
+
+    Args:
+        paths (list): sequence paths, e.g. /renders/comp.%04d.exr
+        max_workers (int, optional): amount of directories scanned at
+        the same time. Defaults to 8.
+        progress (Progress, optional): progress of the task running the
+        scan, used to report and stop when cancelled
+
+    Returns:
+        dict: containing every path with its sorted frame numbers
+    """
+    frames = {}
+
+    # Group sequences sharing a directory, e.g. outputs per channel
+    directories = {}
+    for path in dict.fromkeys(paths):
+        pattern = SequencePattern.from_path(path)
+        if pattern is None:
+            frames[path] = []
+            continue
+
+        directories.setdefault(pattern.directory, []).append((path, pattern))
+
+    def scan(directory):
+        sequences = directories[directory]
+        results = _scan_directory(
+            directory, [pattern for path, pattern in sequences], progress
+        )
+        return zip([path for path, pattern in sequences], results)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for results in executor.map(scan, directories):
+            frames.update(results)
+
+    logger.debug(
+        "Scanned %s sequences in %s directories"
+        % (len(frames), len(directories))
+    )
+
+    return frames
+
+
+def _scan_directory(directory, patterns, progress=None):
+    """List the directory once, and collect the frames of every pattern.
+    Listings are shared by the whole process.
+
+    Args:
+        directory (str): directory to scan
+        patterns (list): patterns of the sequences in the directory
+        progress (Progress, optional): progress of the task running the
+        scan, used to report and stop when cancelled
+
+    Returns:
+        list: sorted frame numbers for every pattern
+    """
+    if progress is not None:
+        progress.set_message("Scanning %s" % directory)
+
+    # Listing is only done again when the directory has changed
+    try:
+        return directory_listings.get_frames(directory, patterns, progress)
+    except OSError as error:
+        logger.debug("Could not scan %s, because %s" % (directory, str(error)))
+        return [[] for pattern in patterns]
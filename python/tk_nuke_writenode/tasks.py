@@ -0,0 +1,188 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+import nuke
+from concurrent.futures import ThreadPoolExecutor
+
+# standard toolkit logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+class TaskCancelled(Exception):
+    """
+    Raised inside a task when the user cancelled it
+    """
+
+
+class Progress(object):
+    """
+    Progress of a background task, shown as a Nuke progress bar
+    when running with a user interface
+    """
+
+    def __init__(self, title, interactive):
+        """Progress for the task
+
+        Args:
+            title (str): title to show on the progress bar
+            interactive (bool): show the progress bar
+        """
+        self._task = nuke.ProgressTask(title) if interactive else None
+
+    def set_message(self, message):
+        """Set message describing what the task is doing
+
+        Args:
+            message (str): message to show
+        """
+        if self._task is not None:
+            self._task.setMessage(message)
+
+    def set_progress(self, percentage):
+        """Set percentage of the task that is done
+
+        Args:
+            percentage (int): percentage between 0 and 100
+        """
+        if self._task is not None:
+            self._task.setProgress(int(percentage))
+
+    def is_cancelled(self):
+        """Check if user has cancelled the task
+
+        Returns:
+            bool: True if cancelled
+        """
+        return self._task is not None and self._task.isCancelled()
+
+    def check_cancelled(self):
+        """Stop the task if the user has cancelled it
+
+        Raises:
+            TaskCancelled: if the user has cancelled the task
+        """
+        if self.is_cancelled():
+            raise TaskCancelled()
+
+    def close(self):
+        """Remove the progress bar"""
+        # Progress bar disappears when the task is deleted
+        self._task = None
+
+
+class TaskRunner(object):
+    """
+    Runs slow ShotGrid and file system work on a bounded thread pool, and
+    calls back on the main thread so nodes can be touched safely. Runs
+    everything synchronously when there is no user interface.
+    """
+
+    MAX_WORKERS = 4
+
+    def __init__(self, max_workers=None):
+        """Runner using the specified amount of threads
+
+        Args:
+            max_workers (int, optional): maximum amount of threads.
+            Defaults to MAX_WORKERS.
+        """
+        self.max_workers = max_workers or self.MAX_WORKERS
+        self._executor = None
+
+    @staticmethod
+    def is_interactive():
+        """Check if Nuke runs with a user interface
+
+        Returns:
+            bool: True if there is a user interface
+        """
+        return bool(nuke.GUI)
+
+    def run(self, title, function, callback, error_callback=None):
+        """Run function in the background, and call the callback on the
+        main thread with its result
+
+        Args:
+            title (str): title to show on the progress bar
+            function (callable): function to run, receives a Progress
+            callback (callable): called with the result of the function
+            error_callback (callable, optional): called with the exception
+            if the function failed. Defaults to showing a message.
+
+        Returns:
+            object: future of the task, None when ran synchronously
+        """
+        error_callback = error_callback or self.__show_error
+
+        # Without user interface nothing can freeze, and there
+        # is no event loop to call back on
+        if not self.is_interactive():
+            try:
+                result = function(Progress(title, False))
+            except TaskCancelled:
+                return None
+            except Exception as e:
+                error_callback(e)
+                return None
+
+            callback(result)
+            return None
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        return self._executor.submit(
+            self.__run, title, function, callback, error_callback
+        )
+
+    def shutdown(self):
+        """Stop the thread pool, running tasks will finish"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    @staticmethod
+    def __run(title, function, callback, error_callback):
+        """Run function on a worker thread
+
+        Args:
+            title (str): title to show on the progress bar
+            function (callable): function to run, receives a Progress
+            callback (callable): called with the result on the main thread
+            error_callback (callable): called with the exception on the
+            main thread
+        """
+        progress = Progress(title, True)
+        try:
+            result = function(progress)
+
+        except TaskCancelled:
+            logger.debug("%s has been cancelled" % title)
+            return
+
+        except Exception as e:
+            logger.debug("%s failed, because %s" % (title, str(e)))
+            nuke.executeInMainThread(error_callback, args=(e,))
+            return
+
+        finally:
+            progress.close()
+
+        nuke.executeInMainThread(callback, args=(result,))
+
+    @staticmethod
+    def __show_error(error):
+        """Show the error to the user
+
+        Args:
+            error (Exception): error raised by the task
+        """
+        nuke.message(str(error))
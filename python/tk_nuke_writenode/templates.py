@@ -0,0 +1,266 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+import os
+import threading
+from collections import OrderedDict
+
+# standard toolkit logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+class TemplatePathCache(object):
+    """
+    Remembers fields parsed from paths and the publish paths calculated
+    from them, with least recently used eviction. Templates are part of
+    the key, so changed templates never return stale paths.
+    """
+
+    def __init__(self, max_size=4096):
+        """Cache with the specified limit
+
+        Args:
+            max_size (int, optional): maximum amount of entries of both
+            the fields and the publish paths. Defaults to 4096.
+        """
+        self.max_size = max_size
+        self._fields = OrderedDict()
+        self._published_paths = OrderedDict()
+
+        # Paths are calculated on background threads as well
+        self._lock = threading.Lock()
+
+        # Counters to see how effective the cache is
+        self.hits = 0
+        self.misses = 0
+
+    def get_fields(self, template, path):
+        """Get fields of the path, parsed by the template
+
+        Args:
+            template (TemplatePath): template matching the path
+            path (str): path to get fields from
+
+        Returns:
+            dict: fields of the path
+        """
+        key = (self.__get_template_key(template), path)
+
+        fields = self.__get(self._fields, key)
+        if fields is None:
+            fields = template.get_fields(path)
+            self.__set(self._fields, key, fields)
+
+        # Callers are free to change the fields
+        return dict(fields)
+
+    def get_published_path(self, render_template, publish_template, path):
+        """Get publish path for the render path
+
+        Args:
+            render_template (TemplatePath): template matching the path
+            publish_template (TemplatePath): template of the publish path
+            path (str): render path
+
+        Returns:
+            str: publish path
+        """
+        key = (
+            self.__get_template_key(render_template),
+            self.__get_template_key(publish_template),
+            path,
+        )
+
+        published_path = self.__get(self._published_paths, key)
+        if published_path is None:
+            fields = self.get_fields(render_template, path)
+            published_path = publish_template.apply_fields(fields).replace(
+                os.sep, "/"
+            )
+            self.__set(self._published_paths, key, published_path)
+
+        return published_path
+
+    def clear(self):
+        """Remove all entries, e.g. when the templates have been reloaded"""
+        self.log_stats()
+
+        with self._lock:
+            self._fields.clear()
+            self._published_paths.clear()
+
+    def get_stats(self):
+        """Get statistics of the cache
+
+        Returns:
+            dict: containing hits, misses, hit rate and amount of entries
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": float(self.hits) / lookups if lookups else 0.0,
+                "entries": len(self._fields) + len(self._published_paths),
+            }
+
+    def log_stats(self):
+        """Log the hit rate of the cache"""
+        stats = self.get_stats()
+        if stats["hits"] or stats["misses"]:
+            logger.debug(
+                "Template path cache: %(hits)s hits, %(misses)s misses, "
+                "hit rate %(hit_rate).0f%%, %(entries)s entries"
+                % dict(stats, hit_rate=stats["hit_rate"] * 100)
+            )
+
+    def __get(self, entries, key):
+        """Get entry, marking it as most recently used
+
+        Args:
+            entries (OrderedDict): entries to get from
+            key (tuple): key of the entry
+
+        Returns:
+            object: cached value, None if not cached
+        """
+        with self._lock:
+            value = entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+
+            entries.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def __set(self, entries, key, value):
+        """Set entry, evicting the least recently used if full
+
+        Args:
+            entries (OrderedDict): entries to set in
+            key (tuple): key of the entry
+            value (object): value to cache
+        """
+        with self._lock:
+            entries[key] = value
+            entries.move_to_end(key)
+
+            while len(entries) > self.max_size:
+                entries.popitem(last=False)
+
+    @staticmethod
+    def __get_template_key(template):
+        """Get key identifying the template, including its definition so
+        a changed template doesn't match its old entries
+
+        Args:
+            template (TemplatePath): template to identify
+
+        Returns:
+            tuple: name and definition of the template
+        """
+        return (template.name, template.definition)
+
+
+class ScriptContext(object):
+    """
+    Fields of the current script path, parsed once per script load
+    or save so paths of all nodes can be calculated from them. Render
+    paths calculated for the script are remembered as well.
+    """
+
+    __slots__ = ("path", "template", "fields", "_render_paths")
+
+    def __init__(self, path, template):
+        """Context of the script
+
+        Args:
+            path (str): path of the script
+            template (TemplatePath): work template matching the path
+        """
+        self.path = path
+        self.template = template
+        self.fields = template.get_fields(path)
+        self._render_paths = {}
+
+    @property
+    def version(self):
+        """int: version of the script"""
+        return self.fields["version"]
+
+    def get_fields(self, version_offset=0):
+        """Get fields of the script, to calculate paths from
+
+        Args:
+            version_offset (int, optional): amount to add to the script
+            version, e.g. 1 for the next version. Defaults to 0.
+
+        Returns:
+            dict: copy of the fields, free to be changed
+        """
+        fields = dict(self.fields)
+        fields["version"] = self.version + version_offset
+
+        return fields
+
+    def get_render_path(
+        self, render_template, output, version_offset=0, fields=None
+    ):
+        """Get render path of an output for this script
+
+        Args:
+            render_template (TemplatePath): template of the render path
+            output (str): output name of the node
+            version_offset (int, optional): amount to add to the script
+            version. Defaults to 0.
+            fields (dict, optional): fields of the node besides the
+            output, e.g. eye, channel, width and height
+
+        Returns:
+            str: render path, with %d as frame specification
+        """
+        fields = fields or {}
+        key = (
+            render_template.name,
+            render_template.definition,
+            output,
+            version_offset,
+            tuple(sorted(fields.items())),
+        )
+
+        render_path = self._render_paths.get(key)
+        if render_path is None:
+            fields = dict(self.get_fields(version_offset), **fields)
+            fields["SEQ"] = "FORMAT: %d"
+            fields["output"] = output
+
+            render_path = render_template.apply_fields(fields).replace(
+                os.sep, "/"
+            )
+            self._render_paths[key] = render_path
+
+        return render_path
+
+    def get_script_path(self, version_offset=0):
+        """Get path of the script for another version
+
+        Args:
+            version_offset (int, optional): amount to add to the script
+            version. Defaults to 0.
+
+        Returns:
+            str: path of the script
+        """
+        return self.template.apply_fields(
+            self.get_fields(version_offset)
+        ).replace(os.sep, "/")
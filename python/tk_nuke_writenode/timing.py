@@ -0,0 +1,244 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# standard toolkit logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+class _NullSpan(object):
+    """
+    Span used while timing is disabled, does nothing
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span(object):
+    """
+    Timing of a single operation, containing the operations it called
+    """
+
+    __slots__ = ("timer", "name", "start", "duration", "children")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+        self.start = None
+        self.duration = None
+        self.children = []
+
+    def __enter__(self):
+        self.timer._push(self)
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *args):
+        self.duration = time.time() - self.start
+        self.timer._pop(self)
+        return False
+
+    def to_dict(self):
+        """Convert span with its children to a dictionary
+
+        Returns:
+            dict: containing name, start, duration and children
+        """
+        return {
+            "name": self.name,
+            "start": self.start,
+            "duration": self.duration,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+class Timer(object):
+    """
+    Records nested timings of operations. Costs close to nothing
+    while disabled.
+    """
+
+    # Amount of durations kept per operation for the percentiles
+    MAX_SAMPLES = 1000
+
+    def __init__(self):
+        self.enabled = False
+        self.log_path = None
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._durations = {}
+
+    def configure(self, enabled, log_path=None):
+        """Enable or disable timing
+
+        Args:
+            enabled (bool): record timings
+            log_path (str, optional): JSON-lines file to append timings
+            and summaries to
+        """
+        self.enabled = enabled
+        self.log_path = log_path or None
+
+    def span(self, name):
+        """Time an operation, to use as context manager
+
+        Args:
+            name (str): name of the operation, e.g. shotgun.find
+
+        Returns:
+            object: context manager timing the operation
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+
+        return Span(self, name)
+
+    def get_summary(self):
+        """Get aggregated timings per operation
+
+        Returns:
+            dict: containing operation name with count, total, p50 and
+            p95 in seconds
+        """
+        with self._lock:
+            durations = dict(
+                (name, sorted(samples))
+                for name, samples in self._durations.items()
+            )
+
+        summary = {}
+        for name, samples in durations.items():
+            summary[name] = {
+                "count": len(samples),
+                "total": sum(samples),
+                "p50": self.__percentile(samples, 50),
+                "p95": self.__percentile(samples, 95),
+            }
+
+        return summary
+
+    def flush(self):
+        """Log the summary and append it to the log file"""
+        if not self._durations:
+            return
+
+        summary = self.get_summary()
+        for name in sorted(summary):
+            logger.debug(
+                "Timing %(name)s: %(count)s calls, "
+                "p50 %(p50).4fs, p95 %(p95).4fs"
+                % dict(summary[name], name=name)
+            )
+
+        self.__write({"type": "summary", "operations": summary})
+
+    def reset(self):
+        """Remove all recorded timings"""
+        with self._lock:
+            self._durations.clear()
+
+    def _push(self, span):
+        """Start span, nested in the span running on this thread"""
+        stack = self.__get_stack()
+        if stack:
+            stack[-1].children.append(span)
+        stack.append(span)
+
+    def _pop(self, span):
+        """Finish span, reporting it when it is the outermost one"""
+        stack = self.__get_stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+
+        with self._lock:
+            samples = self._durations.get(span.name)
+            if samples is None:
+                samples = deque(maxlen=self.MAX_SAMPLES)
+                self._durations[span.name] = samples
+            samples.append(span.duration)
+
+        if not stack:
+            logger.debug("Timing %s took %.4fs" % (span.name, span.duration))
+            self.__write(dict(span.to_dict(), type="span"))
+
+    def __get_stack(self):
+        """Get spans running on this thread"""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def __write(self, record):
+        """Append record to the log file, if set"""
+        if not self.log_path:
+            return
+
+        record["pid"] = os.getpid()
+        try:
+            with self._lock:
+                with open(self.log_path, "a") as log_file:
+                    log_file.write(json.dumps(record) + "\n")
+
+        except (IOError, OSError) as e:
+            logger.debug(
+                "Could not write timings to %s, because %s"
+                % (self.log_path, str(e))
+            )
+
+    @staticmethod
+    def __percentile(samples, percentage):
+        """Get percentile of the sorted samples"""
+        if not samples:
+            return None
+
+        index = int(round((len(samples) - 1) * percentage / 100.0))
+        return samples[index]
+
+
+def timed(name):
+    """Decorator timing the decorated function as an operation
+
+    Args:
+        name (str): name of the operation
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not timer.enabled:
+                return function(*args, **kwargs)
+
+            with timer.span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# Shared by all modules of the app, configured by the handler
+timer = Timer()
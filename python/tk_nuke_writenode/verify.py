@@ -0,0 +1,279 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .sequences import FrameRange, SequencePattern
+from .tasks import TaskCancelled
+from .timing import timed
+
+# standard toolkit logger
+logger = sgtk.platform.get_logger(__name__)
+
+
+class FrameVerification(object):
+    """
+    Result of verifying the rendered frames of a sequence
+    """
+
+    __slots__ = (
+        "path",
+        "first_frame",
+        "last_frame",
+        "missing",
+        "empty",
+        "truncated",
+        "duration",
+    )
+
+    def __init__(
+        self,
+        path,
+        first_frame,
+        last_frame,
+        missing=None,
+        empty=None,
+        truncated=None,
+        duration=0.0,
+    ):
+        """Verification of the sequence over the frame range
+
+        Args:
+            path (str): sequence path, e.g. /renders/comp.%04d.exr
+            first_frame (int): first frame expected
+            last_frame (int): last frame expected
+            missing (FrameRange, optional): frames that don't exist
+            empty (FrameRange, optional): frames of zero bytes
+            truncated (FrameRange, optional): frames much smaller than
+            the other frames, most likely not written completely
+            duration (float, optional): seconds spent verifying
+        """
+        self.path = path
+        self.first_frame = first_frame
+        self.last_frame = last_frame
+        self.missing = missing or FrameRange()
+        self.empty = empty or FrameRange()
+        self.truncated = truncated or FrameRange()
+        self.duration = duration
+
+    @classmethod
+    def combine(cls, path, verifications):
+        """Combine verifications of the views of a sequence
+
+        Args:
+            path (str): sequence path of all views, e.g. comp_%V.%04d.exr
+            verifications (list): verification of every view
+
+        Returns:
+            FrameVerification: frames invalid in any of the views
+        """
+        if len(verifications) == 1:
+            return verifications[0]
+
+        def combine_frames(name):
+            frames = set()
+            for verification in verifications:
+                frames.update(getattr(verification, name))
+            return FrameRange.from_frames(frames)
+
+        return cls(
+            path,
+            min(verification.first_frame for verification in verifications),
+            max(verification.last_frame for verification in verifications),
+            combine_frames("missing"),
+            combine_frames("empty"),
+            combine_frames("truncated"),
+            sum(verification.duration for verification in verifications),
+        )
+
+    @property
+    def complete(self):
+        """bool: True if all frames exist and look valid"""
+        return not (self.missing or self.empty or self.truncated)
+
+    def to_dict(self):
+        """Convert verification to a compact dictionary, frames are
+        stored as frame lists, e.g. 1001-1010,1012
+
+        Returns:
+            dict: containing path, frame range, invalid frames and duration
+        """
+        return {
+            "path": self.path,
+            "first": self.first_frame,
+            "last": self.last_frame,
+            "missing": str(self.missing),
+            "empty": str(self.empty),
+            "truncated": str(self.truncated),
+            "duration": round(self.duration, 3),
+        }
+
+    def to_json(self):
+        """Convert verification to compact JSON, to store on a node
+
+        Returns:
+            str: JSON of the verification
+        """
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    def __str__(self):
+        if self.complete:
+            return "Frames %s-%s are complete in %s" % (
+                self.first_frame,
+                self.last_frame,
+                self.path,
+            )
+
+        problems = []
+        for description, frames in (
+            ("missing", self.missing),
+            ("empty", self.empty),
+            ("truncated", self.truncated),
+        ):
+            if frames:
+                problems.append("%s %s" % (frames, description))
+
+        return "Frames %s in %s" % (", ".join(problems), self.path)
+
+
+def _get_size(path):
+    """Get size of the file
+
+    Args:
+        path (str): file to get size of
+
+    Returns:
+        int: size in bytes, None if the file doesn't exist
+    """
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
+
+def _get_sizes(pattern, frames):
+    """Get size of every frame, runs on a worker thread
+
+    Args:
+        pattern (SequencePattern): pattern of the sequence
+        frames (range): frames to check
+
+    Returns:
+        dict: containing frame with its size, None if it doesn't exist
+    """
+    return dict(
+        (frame, _get_size(pattern.get_path(frame))) for frame in frames
+    )
+
+
+@timed("filesystem.verify_frames")
+def verify_frames(
+    path,
+    first_frame,
+    last_frame,
+    max_workers=16,
+    truncated_ratio=0.1,
+    progress=None,
+):
+    """Verify all frames of the sequence have been rendered. Every frame
+    is checked with a single stat, spread over threads as network
+    storage mostly spends time waiting.
+
+    Can run without Nuke, e.g. as post task on the farm.
+
+    Args:
+        path (str): sequence path, e.g. /renders/comp.%04d.exr
+        first_frame (int): first frame expected
+        last_frame (int): last frame expected
+        max_workers (int, optional): amount of threads checking frames.
+        Defaults to 16.
+        truncated_ratio (float, optional): frames smaller than this part
+        of the median frame size are considered truncated. Defaults to 0.1.
+        progress (Progress, optional): progress of the task running the
+        verification, used to report and stop when cancelled
+
+    Returns:
+        FrameVerification: frames missing, empty or truncated
+
+    Raises:
+        ValueError: if the path doesn't contain a frame specification
+    """
+    pattern = SequencePattern.from_path(path)
+    if pattern is None:
+        raise ValueError("%s is not a frame sequence" % path)
+
+    start_time = time.time()
+    frames = range(first_frame, last_frame + 1)
+
+    if progress is not None:
+        progress.set_message("Verifying %s" % os.path.basename(path))
+
+    # Check the frames in chunks, so progress can be reported
+    # without a future per frame
+    chunk_size = max(1, min(64, len(frames) // (max_workers * 4)))
+    sizes = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                _get_sizes, pattern, frames[index : index + chunk_size]
+            )
+            for index in range(0, len(frames), chunk_size)
+        ]
+
+        try:
+            for index, future in enumerate(as_completed(futures)):
+                sizes.update(future.result())
+
+                if progress is not None:
+                    progress.check_cancelled()
+                    progress.set_progress(100.0 * index / len(futures))
+
+        except TaskCancelled:
+            for future in futures:
+                future.cancel()
+            raise
+
+    missing = []
+    empty = []
+    truncated = []
+
+    # Frames are compared to the median, so sequences
+    # with a few heavy frames don't hide truncated ones
+    valid_sizes = sorted(size for size in sizes.values() if size)
+    minimum_size = 0
+    if valid_sizes:
+        minimum_size = valid_sizes[len(valid_sizes) // 2] * truncated_ratio
+
+    for frame in frames:
+        size = sizes.get(frame)
+        if size is None:
+            missing.append(frame)
+        elif size == 0:
+            empty.append(frame)
+        elif size < minimum_size:
+            truncated.append(frame)
+
+    verification = FrameVerification(
+        path,
+        first_frame,
+        last_frame,
+        FrameRange.from_frames(missing),
+        FrameRange.from_frames(empty),
+        FrameRange.from_frames(truncated),
+        time.time() - start_time,
+    )
+    logger.debug(
+        "%s, verified in %.3f seconds" % (verification, verification.duration)
+    )
+
+    return verification
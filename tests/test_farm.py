@@ -0,0 +1,90 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""Tests of submitting write nodes to the farm, using a stand-in for
+the deadline_submission module."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks")
+)
+
+import run_benchmarks  # noqa: E402
+import stubs  # noqa: E402
+
+stubs.install()
+
+from tk_nuke_writenode.handler import NukeWriteNodeHandler  # noqa: E402
+
+
+class FarmSubmissionTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        app = stubs.install(run_benchmarks.create_app(self.directory))
+        self.nuke = sys.modules["nuke"]
+        self.nuke.reset()
+
+        self.handler = NukeWriteNodeHandler()
+        self.nodes = run_benchmarks.build_script(
+            self.nuke, self.handler, app, 3
+        )
+
+    def tearDown(self):
+        sys.modules.pop("deadline_submission", None)
+
+        # Directories of the next version are created in the background
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def submit(self, failing=()):
+        deadline_submission = stubs.create_deadline_submission(failing)
+        sys.modules["deadline_submission"] = deadline_submission
+
+        failed_nodes = self.handler.render_farm_multiple(self.nodes)
+
+        return deadline_submission.submitted, failed_nodes
+
+    def test_batch_increments_script_once(self):
+        submitted, failed_nodes = self.submit()
+
+        self.assertEqual(submitted, [node.name() for node in self.nodes])
+        self.assertEqual(failed_nodes, {})
+        self.assertEqual(self.nuke.root().name(), "/work/shot_v002.nk")
+        self.assertEqual(self.nuke.messages, [])
+
+        submission = self.handler.last_farm_submission
+        self.assertTrue(submission["submitted"])
+        self.assertGreaterEqual(submission["latency"], 0)
+
+    def test_partial_failure_still_increments(self):
+        failing = self.nodes[1].name()
+        submitted, failed_nodes = self.submit([failing])
+
+        self.assertEqual(len(submitted), 2)
+        self.assertEqual(list(failed_nodes), [failing])
+        self.assertEqual(self.nuke.root().name(), "/work/shot_v002.nk")
+        self.assertIn(failing, self.nuke.messages[-1])
+
+    def test_failed_batch_keeps_script(self):
+        submitted, failed_nodes = self.submit(
+            [node.name() for node in self.nodes]
+        )
+
+        self.assertEqual(submitted, [])
+        self.assertEqual(len(failed_nodes), 3)
+        self.assertEqual(self.nuke.root().name(), "/work/shot_v001.nk")
+
+
+if __name__ == "__main__":
+    unittest.main()
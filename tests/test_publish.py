@@ -0,0 +1,64 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""Tests of the version agnostic publish codes, using the stand-ins of
+the benchmarks so they run without Toolkit and Nuke."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks")
+)
+
+import stubs  # noqa: E402
+
+stubs.install()
+
+from tk_nuke_writenode.publish import VersionPattern  # noqa: E402
+
+
+class VersionPatternTest(unittest.TestCase):
+    def test_version_in_code(self):
+        pattern = VersionPattern.from_codes(
+            "comp_v001.%04d.exr", "comp_v9999.%04d.exr"
+        )
+
+        self.assertEqual(pattern, VersionPattern("comp_v", ".%04d.exr"))
+        self.assertEqual(pattern.match("comp_v012.%04d.exr"), 12)
+        self.assertIsNone(pattern.match("comp_vabc.%04d.exr"))
+        self.assertIsNone(pattern.match("other_v012.%04d.exr"))
+
+    def test_version_only_in_directory(self):
+        pattern = VersionPattern.from_codes("comp.%04d.exr", "comp.%04d.exr")
+
+        self.assertEqual(pattern.match("comp.%04d.exr"), -1)
+        self.assertIsNone(pattern.match("comp_v001.%04d.exr"))
+
+    def test_version_twice_in_code(self):
+        pattern = VersionPattern.from_codes(
+            "a_v001_b_v001.exr", "a_v9999_b_v9999.exr"
+        )
+
+        self.assertEqual(pattern.infixes, ("_b_v",))
+        self.assertEqual(pattern.match("a_v003_b_v003.exr"), 3)
+        self.assertIsNone(pattern.match("a_v003_b_v002.exr"))
+        self.assertIsNone(pattern.match("a_v003_c_v003.exr"))
+        self.assertNotEqual(pattern, VersionPattern("a_v", ".exr"))
+
+    def test_codes_differing_in_more_than_the_version(self):
+        self.assertIsNone(
+            VersionPattern.from_codes("a_v001_x.exr", "a_v9999_yz.exr")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,300 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""Tests of the local publish index, using the stand-ins of the
+benchmarks so they run without Toolkit and Nuke."""
+
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks")
+)
+
+import stubs  # noqa: E402
+
+stubs.install()
+
+from tk_nuke_writenode.publish import VersionPattern  # noqa: E402
+from tk_nuke_writenode.publish_index import PublishedFileIndex  # noqa: E402
+
+START = datetime.datetime(2024, 1, 1, 12, 0, 0)
+
+
+class FakePublishes(object):
+    """ShotGrid stand-in holding PublishedFile entities, supporting the
+    filters, ordering and limit the index sends"""
+
+    def __init__(self):
+        self.entities = {}
+        self.queries = []
+        self.threads = []
+        self.error = None
+
+    def add(self, entity_id, code, version=1, seconds=0, project_id=1):
+        self.entities[entity_id] = {
+            "type": "PublishedFile",
+            "id": entity_id,
+            "project": {"type": "Project", "id": project_id},
+            "code": code,
+            "path": {"local_path": "/publish/%s" % code},
+            "version_number": version,
+            "updated_at": START + datetime.timedelta(seconds=seconds),
+            "retired": False,
+        }
+
+    def retire(self, entity_id, seconds=0):
+        self.entities[entity_id]["retired"] = True
+        self.entities[entity_id]["updated_at"] = START + datetime.timedelta(
+            seconds=seconds
+        )
+
+    def find(
+        self,
+        entity_type,
+        filters,
+        fields=None,
+        order=None,
+        limit=0,
+        retired_only=False,
+    ):
+        self.queries.append(filters)
+        self.threads.append(threading.current_thread())
+        if self.error is not None:
+            raise self.error
+
+        results = []
+        for entity in sorted(self.entities.values(), key=lambda e: e["id"]):
+            if entity["retired"] != retired_only:
+                continue
+            if all(self.__match(entity, *f) for f in filters):
+                results.append(dict(entity))
+
+        return results[:limit] if limit else results
+
+    @staticmethod
+    def __match(entity, field, operator, value):
+        if operator == "is":
+            return entity[field] == value
+        if operator == "greater_than":
+            return entity[field] > value
+        raise ValueError("Unsupported operator %s" % operator)
+
+
+class PublishedFileIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "index", "publishes.db")
+        self.sg = FakePublishes()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def create_index(self, **kwargs):
+        index = PublishedFileIndex(self.sg, self.path, **kwargs)
+        index.PAGE_SIZE = 2
+        self.addCleanup(index.wait)
+        return index
+
+    def test_first_sync_fetches_all_pages(self):
+        for entity_id in range(1, 6):
+            self.sg.add(entity_id, "comp_v%03d.exr" % entity_id)
+        index = self.create_index()
+
+        found = index.find_many(1, ["comp_v001.exr", "comp_v005.exr", "x"])
+
+        self.assertEqual(sorted(found), ["comp_v001.exr", "comp_v005.exr"])
+        self.assertEqual(found["comp_v005.exr"]["id"], 5)
+        self.assertEqual(
+            found["comp_v001.exr"]["path"]["local_path"],
+            "/publish/comp_v001.exr",
+        )
+
+        # Pages of 2, the last page is smaller so no extra query
+        self.assertEqual(len(self.sg.queries), 3)
+        self.assertEqual(
+            [query[-1] for query in self.sg.queries],
+            [
+                ["id", "greater_than", 0],
+                ["id", "greater_than", 2],
+                ["id", "greater_than", 4],
+            ],
+        )
+
+    def test_lookups_within_interval_do_not_query(self):
+        self.sg.add(1, "comp_v001.exr")
+        index = self.create_index(sync_interval=60)
+
+        index.find_one(1, "comp_v001.exr")
+        index.find_one(1, "comp_v001.exr")
+        index.find_one(1, "comp_v002.exr")
+
+        self.assertEqual(len(self.sg.queries), 1)
+
+    def test_sync_is_shared_by_sessions(self):
+        self.sg.add(1, "comp_v001.exr")
+        self.create_index(sync_interval=60).sync(1)
+
+        other_session = self.create_index(sync_interval=60)
+        self.assertEqual(other_session.find_one(1, "comp_v001.exr")["id"], 1)
+        self.assertEqual(len(self.sg.queries), 1)
+
+    def test_incremental_sync_only_fetches_updates(self):
+        self.sg.add(1, "comp_v001.exr", seconds=-10)
+        self.sg.add(2, "comp_v002.exr", seconds=-10)
+        self.sg.add(3, "comp_v003.exr")
+        index = self.create_index(sync_interval=0)
+        index.sync(1)
+
+        # Updated within the same second as the last publish fetched,
+        # which is fetched again as well
+        self.sg.add(4, "comp_v004.exr")
+        self.sg.add(5, "comp_v005.exr", seconds=10)
+        del self.sg.queries[:]
+
+        self.assertEqual(index.sync(1), 3)
+        self.assertIn(
+            [
+                "updated_at",
+                "greater_than",
+                START - datetime.timedelta(1.0 / 86400),
+            ],
+            self.sg.queries[0],
+        )
+        self.assertEqual(
+            sorted(index.find_many(1, ["comp_v004.exr", "comp_v005.exr"])),
+            ["comp_v004.exr", "comp_v005.exr"],
+        )
+
+    def test_invalidate_syncs_on_next_lookup(self):
+        self.sg.add(1, "comp_v001.exr")
+        index = self.create_index(sync_interval=60)
+        index.sync(1)
+
+        self.sg.add(2, "comp_v002.exr", seconds=5)
+        self.assertIsNone(index.find_one(1, "comp_v002.exr"))
+
+        index.invalidate(1, "comp_v002.exr")
+        self.assertEqual(index.find_one(1, "comp_v002.exr")["id"], 2)
+
+    def test_refresh_removes_deleted_publishes(self):
+        self.sg.add(1, "comp_v001.exr")
+        self.sg.add(2, "comp_v002.exr")
+        index = self.create_index(sync_interval=60)
+        index.sync(1)
+
+        del self.sg.entities[1]
+        self.assertEqual(index.refresh(1), 1)
+
+        self.assertIsNone(index.find_one(1, "comp_v001.exr"))
+        self.assertEqual(index.find_one(1, "comp_v002.exr")["id"], 2)
+
+    def test_incremental_sync_removes_retired_publishes(self):
+        for entity_id in range(1, 5):
+            self.sg.add(entity_id, "comp_v%03d.exr" % entity_id)
+        index = self.create_index(sync_interval=60)
+        index.sync(1)
+
+        for entity_id in range(1, 4):
+            self.sg.retire(entity_id, seconds=5)
+        index.invalidate(1)
+        del self.sg.queries[:]
+
+        # The remaining publish is within the overlap and fetched again
+        self.assertEqual(index.sync(1), 1)
+        self.assertEqual(index.get_stats()["retired_entities"], 3)
+
+        # Retired publishes are paged over the same window, before the
+        # publishes updated since
+        self.assertEqual(len(self.sg.queries), 3)
+        self.assertIn(
+            [
+                "updated_at",
+                "greater_than",
+                START - datetime.timedelta(1.0 / 86400),
+            ],
+            self.sg.queries[0],
+        )
+
+        self.assertEqual(
+            list(index.find_many(1, ["comp_v%03d.exr" % i for i in range(5)])),
+            ["comp_v004.exr"],
+        )
+
+    def test_projects_are_kept_apart(self):
+        self.sg.add(1, "comp_v001.exr", project_id=1)
+        self.sg.add(2, "comp_v001.exr", project_id=2)
+        index = self.create_index(sync_interval=60)
+
+        self.assertEqual(index.find_one(1, "comp_v001.exr")["id"], 1)
+        self.assertEqual(index.find_one(2, "comp_v001.exr")["id"], 2)
+
+    def test_shotgun_errors_keep_index_usable(self):
+        self.sg.add(1, "comp_v001.exr")
+        index = self.create_index(sync_interval=0)
+        index.sync(1)
+
+        self.sg.error = IOError("Site unavailable")
+        self.assertEqual(index.find_one(1, "comp_v001.exr")["id"], 1)
+
+    def test_background_sync_answers_from_index(self):
+        self.sg.add(1, "comp_v001.exr")
+        index = self.create_index(sync_interval=60, background=True)
+
+        # Never synced, so the first lookup has to wait for ShotGrid
+        self.assertEqual(index.find_one(1, "comp_v001.exr")["id"], 1)
+        self.assertEqual(self.sg.threads, [threading.current_thread()])
+
+        # Stale project is answered right away and synced afterwards
+        self.sg.add(2, "comp_v002.exr", seconds=5)
+        index.invalidate(1)
+        self.assertIsNone(index.find_one(1, "comp_v002.exr"))
+
+        index.wait()
+        self.assertGreater(len(self.sg.threads), 1)
+        self.assertNotIn(threading.current_thread(), self.sg.threads[1:])
+
+        # Synced recently, so answered without querying again
+        queries = len(self.sg.queries)
+        self.assertEqual(index.find_one(1, "comp_v002.exr")["id"], 2)
+        self.assertEqual(len(self.sg.queries), queries)
+
+    def test_find_latest(self):
+        self.sg.add(1, "comp_v001.exr", version=1)
+        self.sg.add(2, "comp_v003.exr", version=3)
+        self.sg.add(3, "comp_v002.exr", version=2)
+        self.sg.add(4, "other_v009.exr", version=9)
+        index = self.create_index(sync_interval=60)
+        pattern = VersionPattern("comp_v", ".exr")
+
+        latest = index.find_latest(1, [pattern])
+
+        self.assertEqual(latest[pattern]["id"], 2)
+
+    def test_database_errors_use_fallback(self):
+        class Fallback(object):
+            def find_many(self, project_id, codes):
+                return {"comp_v001.exr": {"id": 1}}
+
+        # Database can't be created where a file exists
+        open(os.path.join(self.directory, "index"), "w").close()
+        index = self.create_index(fallback=Fallback())
+
+        self.assertEqual(index.find_one(1, "comp_v001.exr"), {"id": 1})
+        self.assertEqual(self.sg.queries, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
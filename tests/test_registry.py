@@ -0,0 +1,225 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""Tests of the compiled write node configurations, using the stand-ins
+of the benchmarks so they run without Toolkit and Nuke."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks")
+)
+
+import run_benchmarks  # noqa: E402
+import stubs  # noqa: E402
+
+stubs.install()
+
+from tk_nuke_writenode.handler import NukeWriteNodeHandler  # noqa: E402
+from tk_nuke_writenode.registry import WriteNodeRegistry  # noqa: E402
+
+
+class CountingApp(stubs.FakeApp):
+    """App stand-in counting the template lookups"""
+
+    def __init__(self, *args, **kwargs):
+        super(CountingApp, self).__init__(*args, **kwargs)
+        self.template_lookups = []
+
+    def get_template_by_name(self, name):
+        self.template_lookups.append(name)
+        return super(CountingApp, self).get_template_by_name(name)
+
+
+def write_node(name, **kwargs):
+    """Write node entry as found in the app configuration"""
+    entry = {
+        "name": name,
+        "file_type": "exr",
+        "render_template": "render_work",
+        "publish_template": "render_publish",
+        "tile_color": 0,
+        "settings": {"compression": "DWAA"},
+    }
+    entry.update(kwargs)
+    return entry
+
+
+class WriteNodeRegistryTest(unittest.TestCase):
+    def create_registry(self, categories):
+        self.app = CountingApp(settings={"categories": categories})
+        return WriteNodeRegistry(self.app)
+
+    def test_get_by_category_and_data_type(self):
+        registry = self.create_registry(
+            [
+                {
+                    "category_name": "main",
+                    "write_nodes": [write_node("exr")],
+                },
+                {
+                    "category_name": "prerender",
+                    "write_nodes": [
+                        write_node("exr", settings={"compression": "Zip"}),
+                        write_node("tiff", file_type="tiff"),
+                    ],
+                },
+            ]
+        )
+
+        configuration = registry.get("prerender", "exr")
+        self.assertEqual(configuration.category, "prerender")
+        self.assertEqual(configuration.settings, {"compression": "Zip"})
+        self.assertEqual(configuration.render_template.name, "render_work")
+        self.assertEqual(configuration.publish_template.name, "render_publish")
+        self.assertEqual(
+            registry.get("main", "exr").settings["compression"], "DWAA"
+        )
+        self.assertEqual(registry.get("prerender", "tiff").file_type, "tiff")
+        self.assertEqual(len(registry), 3)
+
+    def test_unknown_data_type(self):
+        registry = self.create_registry(
+            [{"category_name": "main", "write_nodes": [write_node("exr")]}]
+        )
+
+        self.assertIsNone(registry.get("main", "tiff"))
+        self.assertIsNone(registry.get("prerender", "exr"))
+
+    def test_first_match_is_kept(self):
+        registry = self.create_registry(
+            [
+                {
+                    "category_name": "main",
+                    "write_nodes": [
+                        write_node("exr", tile_color=1),
+                        write_node("exr", tile_color=2),
+                    ],
+                }
+            ]
+        )
+
+        self.assertEqual(registry.get("main", "exr").tile_color, 1)
+        self.assertEqual(registry.get_options(), {"main": ["exr"]})
+
+    def test_templates_are_resolved_once(self):
+        self.create_registry(
+            [
+                {
+                    "category_name": "main",
+                    "write_nodes": [write_node("exr"), write_node("tiff")],
+                },
+                {
+                    "category_name": "prerender",
+                    "write_nodes": [write_node("exr")],
+                },
+            ]
+        )
+
+        self.assertEqual(
+            sorted(self.app.template_lookups),
+            ["render_publish", "render_work"],
+        )
+
+    def test_missing_entries(self):
+        registry = self.create_registry(
+            [
+                {"category_name": "empty"},
+                {
+                    "category_name": "main",
+                    "write_nodes": [write_node("exr", settings=None)],
+                },
+            ]
+        )
+
+        self.assertEqual(registry.get("main", "exr").settings, {})
+        self.assertEqual(
+            registry.get_options(), {"empty": [], "main": ["exr"]}
+        )
+
+    def test_options_are_copies(self):
+        registry = self.create_registry(
+            [{"category_name": "main", "write_nodes": [write_node("exr")]}]
+        )
+
+        registry.get_options()["main"].append("tiff")
+
+        self.assertEqual(registry.get_options(), {"main": ["exr"]})
+
+
+class ReloadSettingsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.app = stubs.install(run_benchmarks.create_app(self.directory))
+        self.nuke = sys.modules["nuke"]
+        self.nuke.reset()
+
+        self.handler = NukeWriteNodeHandler()
+        self.node = self.nuke.createNode("sgWrite")
+        self.node["category"].setValue("prerender")
+        self.node["dataType"].setValue("exr (zip 16bit)")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def get_write_knob(self, knob_name):
+        with self.node:
+            return self.nuke.toNode("Write1")[knob_name].value()
+
+    def set_compression(self, compression):
+        for category in self.app.settings["categories"]:
+            for entry in category["write_nodes"]:
+                entry["settings"] = dict(
+                    entry["settings"], compression=compression
+                )
+
+    def test_data_type_applies_knob_settings(self):
+        self.handler.knob_changed(self.node, self.node["dataType"])
+
+        self.assertEqual(self.get_write_knob("compression"), "DWAA")
+        self.assertEqual(self.get_write_knob("file_type"), "exr")
+
+    def test_settings_are_cached_until_reloaded(self):
+        self.set_compression("Zip (1 scanline)")
+        self.handler.knob_changed(self.node, self.node["dataType"])
+        self.assertEqual(self.get_write_knob("compression"), "DWAA")
+
+        self.handler.reload_settings()
+        self.handler.knob_changed(self.node, self.node["dataType"])
+
+        configuration = self.handler.registry.get(
+            "prerender", "exr (zip 16bit)"
+        )
+        self.assertEqual(
+            configuration.settings["compression"], "Zip (1 scanline)"
+        )
+        self.assertEqual(
+            self.get_write_knob("compression"), "Zip (1 scanline)"
+        )
+
+    def test_reload_forgets_template_paths(self):
+        template = self.app.get_template_by_name("render_work")
+        path = template.apply_fields(
+            {"output": "beauty", "version": 1, "SEQ": "%04d"}
+        )
+        self.handler.template_paths.get_fields(template, path)
+        self.assertEqual(self.handler.template_paths.get_stats()["entries"], 1)
+
+        self.handler.reload_settings()
+
+        self.assertEqual(self.handler.template_paths.get_stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""Tests of the index of write nodes in the script, using the stand-ins
+of the benchmarks so they run without Toolkit and Nuke."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks")
+)
+
+import stubs  # noqa: E402
+
+stubs.install()
+
+from tk_nuke_writenode.scene import SceneRegistry  # noqa: E402
+
+
+class SceneRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.nuke = sys.modules["nuke"]
+        self.nuke.reset()
+
+        self.scene = SceneRegistry()
+        self.scene.add_callbacks()
+        self.addCleanup(self.scene.remove_callbacks)
+
+    def create(self, output_name):
+        node = self.nuke.createNode("sgWrite")
+        node["output"].setValue(output_name)
+        self.scene.update(node)
+        return node
+
+    def test_create_and_destroy(self):
+        beauty = self.create("beauty")
+        diffuse = self.create("diffuse")
+
+        self.assertEqual(
+            sorted(self.scene.get_node_names()), ["sgWrite1", "sgWrite2"]
+        )
+        self.assertEqual(self.scene.get_outputs(), {"beauty", "diffuse"})
+        self.assertIs(self.scene.get_node_by_output("diffuse"), diffuse)
+
+        self.nuke.delete(beauty)
+
+        self.assertEqual(self.scene.get_node_names(), ["sgWrite2"])
+        self.assertFalse(self.scene.has_output("beauty"))
+
+    def test_other_nodes_are_ignored(self):
+        self.nuke.createNode("Blur")
+        group = self.nuke.createNode("Group")
+        with group:
+            self.nuke.createNode("sgWrite")["output"].setValue("nested")
+
+        self.scene.rebuild()
+
+        self.assertEqual(self.scene.get_node_names(), [])
+        self.assertEqual(self.scene.get_outputs(), set())
+
+    def test_copies_share_output(self):
+        original = self.create("beauty")
+        copy = self.create("beauty")
+
+        self.assertIs(self.scene.get_node_by_output("beauty"), original)
+
+        self.nuke.delete(original)
+        self.assertIs(self.scene.get_node_by_output("beauty"), copy)
+
+    def test_rename(self):
+        node = self.create("beauty")
+
+        node["name"].setValue("beauty_write")
+        self.scene.rename(node)
+
+        self.assertEqual(self.scene.get_node_names(), ["beauty_write"])
+        self.assertIs(self.scene.get_node_by_output("beauty"), node)
+
+    def test_missed_rename_rebuilds(self):
+        node = self.create("beauty")
+
+        # Renamed without the knobChanged of the node, e.g. on a group
+        # converted from an older gizmo
+        node["name"].setValue("beauty_write")
+
+        self.assertIs(self.scene.get_node_by_output("beauty"), node)
+        self.assertEqual(self.scene.get_node_names(), ["beauty_write"])
+
+    def test_no_callback_on_every_knob_change(self):
+        self.assertEqual(self.nuke._callbacks.get("KnobChanged", []), [])
+
+    def test_script_load_and_close(self):
+        self.create("beauty")
+        self.scene.clear()
+
+        self.nuke.run_callbacks("OnScriptLoad", self.nuke.root())
+        self.assertEqual(self.scene.get_outputs(), {"beauty"})
+
+        self.nuke.run_callbacks("OnScriptClose", self.nuke.root())
+        self.assertEqual(self.scene.get_outputs(), set())
+
+    def test_untracked_scans_script(self):
+        self.scene.remove_callbacks()
+
+        node = self.nuke.createNode("sgWrite")
+        node["output"].setValue("beauty")
+
+        # No callbacks, e.g. in batch sessions, so nothing is missed
+        self.assertEqual(self.scene.get_node_names(), ["sgWrite1"])
+        self.assertIs(self.scene.get_node_by_output("beauty"), node)
+
+
+if __name__ == "__main__":
+    unittest.main()